@@ -9,7 +9,7 @@ from gofish.game_logic import GoFish
 # sys.path.insert(0, path)
 
 def main():
-    gof = GoFish()
+    gof = GoFish.setup()
     again = True
     while again:
         gof.play()
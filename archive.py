@@ -0,0 +1,248 @@
+"""
+Fixed-width game archive and NumPy queries over it.
+
+One ``row_dtype`` row per finished game, appended in blocks by
+``ArchiveWriter``. The header records the seat columns of a row, so a file
+can hold tables of up to that many players. ``Archive`` memory-maps the rows
+and reads each query's columns a chunk of rows at a time, so files larger
+than memory are scanned without building a Python object per game.
+
+Usage: ``python -m gofish.archive run.gfa --games 100000 --seed 1`` appends a
+headless run, ``python -m gofish.archive run.gfa`` reports on the file.
+"""
+import argparse
+import os
+import struct
+import typing as tp
+
+import numpy as np
+
+from gofish.card import GOFISH_MAX_PLAYERS
+from gofish.engine import GameResult, play_games
+
+HEADER = struct.Struct('<4sBHB8x')
+MAGIC = b'GFAR'
+VERSION = 2
+NO_SEAT = 0xFF
+
+
+def row_dtype(seats: int = GOFISH_MAX_PLAYERS) -> np.dtype:
+    """Row of a game at a table of up to seats players."""
+    if not 2 <= seats < NO_SEAT:
+        raise ValueError(f'Cannot archive tables of {seats} seats.')
+    return np.dtype([
+        ('seed', '<u8'),
+        ('num_players', 'u1'),
+        # Seat with the most pairs, 0xFF on a tie
+        ('winner', 'u1'),
+        ('turns', '<u2'),
+        # Seats in the turn order the game started with, padded with 0xFF
+        ('order', 'u1', (seats,)),
+        ('pairs', 'u1', (seats,)),
+    ])
+
+
+def read_header(path: tp.Union[str, os.PathLike]) -> int:
+    """Seat columns of an archive file's rows."""
+    with open(path, 'rb') as f:
+        magic, version, size, seats = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC or version != VERSION or size != row_dtype(seats).itemsize:
+        raise ValueError(f'{path} is not a version {VERSION} game archive.')
+    return seats
+
+
+class ArchiveWriter:
+    """
+    Append GameResults to an archive, ``block_size`` rows per write.
+
+    :param seats: seat columns of a new file, an existing file keeps its own.
+    """
+
+    def __init__(self, path: tp.Union[str, os.PathLike], block_size: int = 1 << 16,
+                 seats: int = GOFISH_MAX_PLAYERS):
+        self.path = path
+        if os.path.exists(path) and os.path.getsize(path):
+            seats = read_header(path)
+        self.seats = seats
+        row = row_dtype(seats)
+        self.file = open(path, 'ab')
+        if self.file.tell() == 0:
+            self.file.write(HEADER.pack(MAGIC, VERSION, row.itemsize, seats))
+        self.block = np.zeros(block_size, row)
+        self.used = 0
+        self.written = 0
+
+    def add(self, result: GameResult):
+        row = self.block[self.used]
+        n = len(result.pairs)
+        if n > self.seats:
+            raise ValueError(f'Cannot archive a {n} player game in {self.seats} seat rows.')
+        row['seed'] = result.seed
+        row['num_players'] = n
+        row['winner'] = NO_SEAT if result.winner is None else result.winner
+        row['turns'] = result.turns
+        row['order'] = (*result.order, *(NO_SEAT,) * (self.seats - n))
+        row['pairs'] = (*result.pairs, *(0,) * (self.seats - n))
+        self.used += 1
+        if self.used == len(self.block):
+            self.flush()
+
+    def extend(self, results: tp.Iterable[GameResult]):
+        for result in results:
+            self.add(result)
+
+    def flush(self):
+        if self.used:
+            self.file.write(self.block[:self.used].tobytes())
+            self.written += self.used
+            self.used = 0
+        self.file.flush()
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Archive:
+    """
+    Read-only view of an archive file.
+
+    Every query takes an optional ``num_players`` to restrict it to tables of
+    that size. Win rates count a tie for first as a shared win.
+    """
+
+    def __init__(self, path: tp.Union[str, os.PathLike], chunk_size: int = 1 << 20):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.seats = read_header(path)
+        row = row_dtype(self.seats)
+        rows = (os.path.getsize(path) - HEADER.size) // row.itemsize
+        if rows:
+            self.rows = np.memmap(path, row, 'r', offset=HEADER.size, shape=(rows,))
+        else:
+            self.rows = np.zeros(0, row)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _chunks(self, num_players: tp.Optional[int] = None) -> tp.Iterator[np.ndarray]:
+        for start in range(0, len(self.rows), self.chunk_size):
+            chunk = self.rows[start:start + self.chunk_size]
+            if num_players is not None:
+                chunk = chunk[chunk['num_players'] == num_players]
+            if len(chunk):
+                yield chunk
+
+    def _win_shares(self, chunk: np.ndarray) -> np.ndarray:
+        pairs = chunk['pairs'].astype(np.float64)
+        seated = np.arange(self.seats) < chunk['num_players'][:, None]
+        pairs[~seated] = -1
+        top = pairs == pairs.max(1, keepdims=True)
+        return top / top.sum(1, keepdims=True)
+
+    def games(self, num_players: tp.Optional[int] = None) -> int:
+        return sum(len(c) for c in self._chunks(num_players))
+
+    def win_rate_by_seat(self, num_players: tp.Optional[int] = None) -> np.ndarray:
+        """Share of games won by each seat index of ``GoFish.players``."""
+        wins = np.zeros(self.seats)
+        seated = np.zeros(self.seats)
+        for chunk in self._chunks(num_players):
+            wins += self._win_shares(chunk).sum(0)
+            seated += np.bincount(chunk['num_players'], minlength=self.seats + 1
+                                  )[::-1].cumsum()[::-1][1:]
+        return np.divide(wins, seated, out=np.full_like(wins, np.nan), where=seated > 0)
+
+    def win_rate_by_position(self, num_players: tp.Optional[int] = None) -> np.ndarray:
+        """Share of games won by the seat moving first, second, and so on."""
+        wins = np.zeros(self.seats)
+        seated = np.zeros(self.seats)
+        for chunk in self._chunks(num_players):
+            shares = self._win_shares(chunk)
+            order = chunk['order']
+            valid = order != NO_SEAT
+            picked = np.take_along_axis(shares, np.where(valid, order, 0), 1)
+            wins += np.where(valid, picked, 0).sum(0)
+            seated += valid.sum(0)
+        return np.divide(wins, seated, out=np.full_like(wins, np.nan), where=seated > 0)
+
+    def first_player_advantage(self, num_players: tp.Optional[int] = None) -> float:
+        """Mean win share of the first player above a fair ``1 / num_players``."""
+        total = 0.0
+        games = 0
+        for chunk in self._chunks(num_players):
+            shares = self._win_shares(chunk)
+            first = shares[np.arange(len(chunk)), chunk['order'][:, 0]]
+            total += (first - 1 / chunk['num_players']).sum()
+            games += len(chunk)
+        return total / games if games else float('nan')
+
+    def mean_pairs_by_num_ai(self) -> tp.Dict[int, float]:
+        """
+        Mean pairs per player keyed by the ``num_ai_prompt`` answer of such a table.
+
+        A table of n players is one seat plus n - 1 AI opponents.
+        """
+        pairs = np.zeros(self.seats + 1)
+        games = np.zeros(self.seats + 1)
+        for chunk in self._chunks():
+            n = chunk['num_players']
+            pairs += np.bincount(n, chunk['pairs'].sum(1), self.seats + 1)
+            games += np.bincount(n, minlength=self.seats + 1)
+        return {n - 1: pairs[n] / (games[n] * n) for n in range(2, self.seats + 1) if games[n]}
+
+    def turn_counts(self, num_players: tp.Optional[int] = None) -> np.ndarray:
+        """Number of games that lasted each number of turns, indexed by turns."""
+        counts = np.zeros(1, np.int64)
+        for chunk in self._chunks(num_players):
+            found = np.bincount(chunk['turns'])
+            if len(found) > len(counts):
+                found[:len(counts)] += counts
+                counts = found
+            else:
+                counts[:len(found)] += found
+        return counts
+
+    def turn_percentiles(self, q: tp.Sequence[float] = (50, 90, 99),
+                         num_players: tp.Optional[int] = None) -> np.ndarray:
+        counts = self.turn_counts(num_players)
+        cumulative = counts.cumsum()
+        if not cumulative[-1]:
+            return np.full(len(q), np.nan)
+        return np.searchsorted(cumulative, np.asarray(q) / 100 * cumulative[-1])
+
+    def report(self, num_players: tp.Optional[int] = None) -> str:
+        def rates(values):
+            return '  '.join(f'{v:6.1%}' for v in values if not np.isnan(v))
+        lines = [f'Games: {self.games(num_players)}',
+                 f'Win rate by seat:     {rates(self.win_rate_by_seat(num_players))}',
+                 f'Win rate by position: {rates(self.win_rate_by_position(num_players))}',
+                 f'First player advantage: {self.first_player_advantage(num_players):+.2%}',
+                 'Turns p50/p90/p99: {}/{}/{}'.format(
+                     *self.turn_percentiles(num_players=num_players))]
+        lines += [f'Mean pairs, {num_ai} AI: {mean:.2f}' for num_ai, mean in
+                  self.mean_pairs_by_num_ai().items()]
+        return '\n'.join(lines)
+
+
+def main(argv: tp.Optional[tp.Sequence[str]] = None):
+    parser = argparse.ArgumentParser(prog='gofish.archive', description=__doc__.splitlines()[1])
+    parser.add_argument('path')
+    parser.add_argument('--games', type=int, default=0, help='headless games to append first')
+    parser.add_argument('--players', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args(argv)
+    if args.games:
+        with ArchiveWriter(args.path) as writer:
+            writer.extend(play_games(args.games, args.seed, args.players))
+    print(Archive(args.path).report())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+"""
+Lockstep Go Fish engine that advances thousands of games with NumPy.
+
+All state is held in arrays indexed by game: rank counts ``hands[g, seat, rank]``,
+deck ranks ``deck[g, i]`` with a per-game ``top``, seating ``order[g]`` with the
+active position ``pos[g]``, and the remembered asks ``memory[g, seat, asker, rank]``.
+Ranks are 0-12 here, one less than ``Card.rank``. The rules are those of
+``Turn.do_ask``, ``Turn.do_go_fish`` and ``Hand.extract_pairs``.
+
+The policies are those of ``bitboard``: ``memory_policy`` is the old
+remembered-asks AI ``turn.memory_strategy``, not the ``CardTracker`` AI of
+``turn.ai_choose_card``, so batch results match the object engine playing
+``memory_strategy`` rather than the built-in AI.
+"""
+import collections as coll
+import typing as tp
+
+import numpy as np
+
+from gofish.card import GOFISH_HAND_SIZE
+
+NUM_RANKS = 13
+NUM_CARDS = 52
+
+BatchResults = coll.namedtuple('BatchResults', 'winner pairs turns')
+BatchResults.__doc__ = """\
+Arrays indexed by game, ``winner`` is the seat with the most pairs or -1 on a tie."""
+Policy = tp.Callable[['BatchGoFish', np.ndarray, np.ndarray], tp.Tuple[np.ndarray, np.ndarray]]
+
+
+def random_policy(batch: 'BatchGoFish', games: np.ndarray, seats: np.ndarray):
+    """Ask a random opponent for the rank of a random card in hand."""
+    rng = batch.rng
+    held = batch.hands[games, seats].cumsum(1)
+    pick = rng.integers(0, held[:, -1])
+    ranks = (held <= pick[:, None]).sum(1)
+    opps = rng.integers(0, batch.num_players - 1, size=len(games))
+    opps += opps >= seats
+    return ranks, opps
+
+
+def memory_policy(batch: 'BatchGoFish', games: np.ndarray, seats: np.ndarray):
+    """Vectorized ``bitboard.memory_strategy``: a remembered ask it can answer, else random."""
+    ranks, opps = random_policy(batch, games, seats)
+    wanted = batch.memory[games, seats] & (batch.hands[games, seats] > 0)[:, None, :]
+    wanted = wanted.reshape(len(games), -1)
+    known = wanted.any(1)
+    first = wanted.argmax(1)
+    return np.where(known, first % NUM_RANKS, ranks), np.where(known, first // NUM_RANKS, opps)
+
+
+class BatchGoFish:
+    def __init__(self, n_games: int, num_players: int = 4,
+                 policies: tp.Optional[tp.Sequence[Policy]] = None,
+                 rng: tp.Optional[np.random.Generator] = None):
+        """
+        :param n_games: number of games advanced together.
+        :param policies: one Policy per seat, defaults to ``memory_policy``.
+        """
+        self.rng = rng or np.random.default_rng()
+        self.n_games = n_games
+        self.num_players = num_players
+        policies = policies or [memory_policy] * num_players
+        seats_by_policy = coll.defaultdict(list)
+        for seat, policy in enumerate(policies):
+            seats_by_policy[policy].append(seat)
+        self._policy_seats = [(p, np.array(s)) for p, s in seats_by_policy.items()]
+        self.new_games()
+
+    def new_games(self):
+        shape = (self.n_games, self.num_players)
+        cards = np.tile(np.arange(NUM_CARDS, dtype=np.int8), (self.n_games, 1))
+        self.deck = self.rng.permuted(cards, axis=1) // 4
+        dealt = GOFISH_HAND_SIZE * self.num_players
+        self.top = np.full(self.n_games, dealt)
+        self.hands = np.zeros((*shape, NUM_RANKS), dtype=np.int8)
+        games = np.arange(self.n_games)
+        for n in range(dealt):
+            self.hands[games, n % self.num_players, self.deck[:, n]] += 1
+        self.pairs = (self.hands // 2).sum(2, dtype=np.int16)
+        self.hands %= 2
+        self.memory = np.zeros((*shape, self.num_players, NUM_RANKS), dtype=bool)
+        seats = np.tile(np.arange(self.num_players), (self.n_games, 1))
+        self.order = self.rng.permuted(seats, axis=1)
+        self.pos = np.zeros(self.n_games, dtype=np.intp)
+        self.turns = np.zeros(self.n_games, dtype=np.int32)
+        self.alive = np.ones(self.n_games, dtype=bool)
+
+    def game_over(self) -> bool:
+        """Retire games whose deck or any hand is empty; True once every game is over."""
+        self.alive &= (self.top < NUM_CARDS) & self.hands.any(2).all(1)
+        return not self.alive.any()
+
+    def choose(self, games: np.ndarray, seats: np.ndarray):
+        if len(self._policy_seats) == 1:
+            return self._policy_seats[0][0](self, games, seats)
+        ranks = np.empty(len(games), dtype=np.intp)
+        opps = np.empty(len(games), dtype=np.intp)
+        for policy, policy_seats in self._policy_seats:
+            mine = np.isin(seats, policy_seats)
+            ranks[mine], opps[mine] = policy(self, games[mine], seats[mine])
+        return ranks, opps
+
+    def step(self):
+        """Play one turn in every live game."""
+        games = np.flatnonzero(self.alive)
+        seats = self.order[games, self.pos[games]]
+        ranks, opps = self.choose(games, seats)
+
+        # do_ask: take one matching card from the opponent
+        asked_match = self.hands[games, opps, ranks] > 0
+        g, s, o, r = games[asked_match], seats[asked_match], opps[asked_match], ranks[asked_match]
+        self.hands[g, o, r] -= 1
+        self.hands[g, s, r] += 1
+
+        # do_go_fish: the opponent remembers the ask and the active seat draws
+        fish = ~asked_match
+        g, s, o, r = games[fish], seats[fish], opps[fish], ranks[fish]
+        self.memory[g, o, s, r] = True
+        drawn = self.deck[g, self.top[g]]
+        self.top[g] += 1
+        self.hands[g, s, drawn] += 1
+        extra_turn = asked_match
+        extra_turn[fish] = drawn == r
+
+        # collect_pairs for the active seats
+        active = self.hands[games, seats]
+        self.pairs[games, seats] += (active // 2).sum(1, dtype=np.int16)
+        self.hands[games, seats] = active % 2
+
+        rotate = games[~extra_turn]
+        self.pos[rotate] = (self.pos[rotate] + 1) % self.num_players
+        self.turns[games] += 1
+
+    def play(self) -> BatchResults:
+        while not self.game_over():
+            self.step()
+        tied = (self.pairs == self.pairs.max(1, keepdims=True)).sum(1) > 1
+        return BatchResults(np.where(tied, -1, self.pairs.argmax(1)), self.pairs, self.turns)
+
+
+def simulate(n_games: int, seed: tp.Optional[int] = None, num_players: int = 4,
+             policies: tp.Optional[tp.Sequence[Policy]] = None,
+             batch_size: int = 10_000) -> BatchResults:
+    """Batched counterpart of ``engine.simulate`` returning arrays instead of GameResults."""
+    rng = np.random.default_rng(seed)
+    results = []
+    for start in range(0, n_games, batch_size):
+        batch = BatchGoFish(min(batch_size, n_games - start), num_players, policies, rng)
+        results.append(batch.play())
+    return BatchResults(*map(np.concatenate, zip(*results)))
@@ -0,0 +1,172 @@
+"""Incremental card tracking for AiPlayer."""
+import typing as tp
+
+if tp.TYPE_CHECKING:
+    from gofish.card import Card
+    from gofish.player import AnyPlayer
+
+RANKS = range(1, 14)
+
+
+class CardTracker:
+    """
+    One player's belief about where every rank is, updated from public events.
+
+    Cards are either known to sit in a hand (``known[player][rank]``), laid down,
+    or unseen. A player's unknown cards are modelled as draws from the unseen
+    pool, except for ranks it denied holding since its last unseen draw. Every
+    event handler is O(1) in the length of the game.
+
+    ``asked[player]`` holds the rank bits player failed to get from the owner,
+    all that the old remembered-asks AI ``turn.memory_strategy`` looks at.
+    """
+
+    def __init__(self, owner: 'AnyPlayer'):
+        self.owner = owner
+        self.known: tp.Dict['AnyPlayer', tp.List[int]] = {}
+        self.known_total: tp.Dict['AnyPlayer', int] = {}
+        self.certain: tp.Dict['AnyPlayer', int] = {}
+        self.excluded: tp.Dict['AnyPlayer', int] = {}
+        self.asked: tp.Dict['AnyPlayer', int] = {}
+        self.sizes: tp.Dict['AnyPlayer', int] = {}
+        self.opponents: tp.Tuple['AnyPlayer', ...] = ()
+        self.unseen = [0] + [4] * 13
+        self.unseen_total = 52
+
+    def reset(self, players: tp.Sequence['AnyPlayer'], copies: int = 4):
+        """
+        Start a new game right after the deal, before any pairs are laid.
+
+        :param copies: cards of each rank in play.
+        """
+        self.opponents = tuple(p for p in players if p is not self.owner)
+        for p in players:
+            self.known[p] = [0] * 14
+            self.known_total[p] = 0
+            self.certain[p] = 0
+            self.excluded[p] = 0
+            self.asked[p] = 0
+            self.sizes[p] = len(p.hand)
+        self.unseen = [0] + [copies] * 13
+        self.unseen_total = 13 * copies
+        for c in self.owner.hand:
+            self._reveal(self.owner, c.rank)
+
+    def snapshot(self, players: tp.Sequence['AnyPlayer']) -> tp.Tuple[int, ...]:
+        """
+        Encode the tracker as a flat tuple of ints, players in seat order.
+
+        Per seat: known rank counts packed a byte per rank, known_total,
+        certain, excluded, asked and size; then the unseen counts packed the
+        same way.
+        """
+        state = []
+        for p in players:
+            known = self.known[p]
+            state += (sum(known[r] << 8 * r for r in RANKS), self.known_total[p],
+                      self.certain[p], self.excluded[p], self.asked[p], self.sizes[p])
+        state.append(sum(self.unseen[r] << 8 * r for r in RANKS))
+        return tuple(state)
+
+    def restore(self, state: tp.Sequence[int], players: tp.Sequence['AnyPlayer']):
+        """Load a ``snapshot`` taken with the same seats."""
+        self.opponents = tuple(p for p in players if p is not self.owner)
+        for seat, p in enumerate(players):
+            (packed, self.known_total[p], self.certain[p], self.excluded[p], self.asked[p],
+             self.sizes[p]) = state[6 * seat:6 * seat + 6]
+            self.known[p] = [0, *((packed >> 8 * r) & 0xFF for r in RANKS)]
+        packed = state[-1]
+        self.unseen = [0, *((packed >> 8 * r) & 0xFF for r in RANKS)]
+        self.unseen_total = sum(self.unseen)
+
+    def _add_known(self, player: 'AnyPlayer', rank: int):
+        self.known[player][rank] += 1
+        self.known_total[player] += 1
+        self.certain[player] |= 1 << rank
+
+    def _reveal(self, player: 'AnyPlayer', rank: int):
+        """An unseen card of rank is now known to be in player's hand."""
+        self.unseen[rank] -= 1
+        self.unseen_total -= 1
+        self._add_known(player, rank)
+
+    def _remove(self, player: 'AnyPlayer', rank: int):
+        """A card of rank left player's hand, either a known one or one we never saw."""
+        known = self.known[player]
+        if known[rank]:
+            known[rank] -= 1
+            self.known_total[player] -= 1
+            if not known[rank]:
+                self.certain[player] &= ~(1 << rank)
+        else:
+            self.unseen[rank] -= 1
+            self.unseen_total -= 1
+
+    def on_ask(self, asker: 'AnyPlayer', opp: 'AnyPlayer', rank: int, gave: bool):
+        """Asker asked opp for rank, opp gave one card if gave else denied holding any."""
+        if not self.known[asker][rank]:
+            self._reveal(asker, rank)
+        self.excluded[asker] &= ~(1 << rank)
+        if gave:
+            self._remove(opp, rank)
+            self._add_known(asker, rank)
+            self.sizes[opp] -= 1
+            self.sizes[asker] += 1
+        else:
+            self.excluded[opp] |= 1 << rank
+            if opp is self.owner:
+                self.asked[asker] |= 1 << rank
+
+    def on_draw(self, player: 'AnyPlayer', card: 'Card', revealed: bool):
+        """Player drew card from the deck, which everyone saw if revealed."""
+        self.sizes[player] += 1
+        if revealed or player is self.owner:
+            self._reveal(player, card.rank)
+        else:
+            self.excluded[player] = 0
+
+    def on_pair(self, player: 'AnyPlayer', rank: int, size: int = 2):
+        """Player laid down size cards of rank, a pair or a book."""
+        for _ in range(size):
+            self._remove(player, rank)
+        self.sizes[player] -= size
+
+    def unknown(self, player: 'AnyPlayer') -> int:
+        return self.sizes[player] - self.known_total[player]
+
+    def probability(self, player: 'AnyPlayer', rank: int) -> float:
+        """Probability that player holds at least one card of rank."""
+        if self.known[player][rank]:
+            return 1.0
+        if self.excluded[player] & (1 << rank) or not self.unseen_total:
+            return 0.0
+        return 1.0 - (1.0 - self.unseen[rank] / self.unseen_total) ** self.unknown(player)
+
+    def best_ask(self, opponents: tp.Optional[tp.Sequence['AnyPlayer']] = None
+                 ) -> tp.Tuple[int, 'AnyPlayer']:
+        """
+        Return ``(rank, opponent)`` with the highest chance of a match.
+
+        Ties go to the first of opponents, pass them in turn order so no seat
+        is asked more often than another. Only the owner's held ranks and the
+        opponents are scanned, so the cost is bounded by 13 x players whatever
+        has happened in the game.
+        """
+        opponents = opponents or self.opponents
+        held = self.certain[self.owner]
+        for opp in opponents:
+            hits = self.certain[opp] & held
+            if hits:
+                return (hits & -hits).bit_length() - 1, opp
+        best = (-1.0, 0, opponents[0])
+        for rank in RANKS:
+            if held & (1 << rank):
+                for opp in opponents:
+                    p = self.probability(opp, rank)
+                    if p > best[0]:
+                        best = (p, rank, opp)
+        return best[1], best[2]
+
+    def known_ranks(self, player: 'AnyPlayer') -> int:
+        """Bits ``1 << rank`` of the ranks player certainly holds."""
+        return self.certain.get(player, 0)
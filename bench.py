@@ -0,0 +1,213 @@
+"""
+Benchmarks for the card primitives, the built-in AI and full headless games.
+
+Each case times ``repeat`` batches of ``number`` calls, reporting ops/sec and
+percentiles of the per-call time across batches, then runs one more batch
+under tracemalloc for the mean peak and retained bytes of a call. Per-call
+state is built before the batch so only the operation itself is timed.
+Baselines are compared on the median, which is steadier than the mean.
+
+Usage: ``python -m gofish.bench --save base.json`` then, after a change,
+``python -m gofish.bench --compare base.json``.
+"""
+import argparse
+import collections as coll
+import fnmatch
+import gc
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+import typing as tp
+
+from gofish.card import CARDS, GOFISH_MAX_PLAYERS, Deck, Hand
+from gofish.engine import HeadlessGoFish, build_ai_players
+from gofish.rules import Rules
+from gofish.turn import ai_choose_card, ai_strategy
+
+Case = coll.namedtuple('Case', 'name setup op number repeat')
+Case.__doc__ = """\
+One benchmark: ``setup(rng)`` builds the state for one call, ``op(state)`` is timed."""
+
+Result = coll.namedtuple('Result',
+                         'name ops_per_sec mean_ns p50_ns p90_ns p99_ns peak_bytes net_bytes')
+
+
+def percentile(sorted_values: tp.Sequence[float], q: float) -> float:
+    """Nearest-rank percentile of already sorted values."""
+    rank = max(0, min(len(sorted_values) - 1, round(q / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[rank]
+
+
+def run_case(case: Case, seed: int = 0, scale: float = 1.0) -> Result:
+    rng = random.Random(seed)
+    number = max(1, int(case.number * scale))
+    repeat = max(3, int(case.repeat * scale))
+    op = case.op
+    per_call = []
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            states = [case.setup(rng) for _ in range(number)]
+            start = time.perf_counter_ns()
+            for state in states:
+                op(state)
+            per_call.append((time.perf_counter_ns() - start) / number)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    states = [case.setup(rng) for _ in range(number)]
+    peak_total = net_total = 0
+    tracemalloc.start()
+    for state in states:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        op(state)
+        after, peak = tracemalloc.get_traced_memory()
+        peak_total += peak - before
+        net_total += after - before
+    tracemalloc.stop()
+    per_call.sort()
+    mean = statistics.fmean(per_call)
+    return Result(case.name, 1e9 / mean, mean, percentile(per_call, 50), percentile(per_call, 90),
+                  percentile(per_call, 99), peak_total / number, net_total / number)
+
+
+def _shuffled_deck(rng: random.Random) -> Deck:
+    return Deck(random.Random(rng.getrandbits(32)))
+
+
+def _dealt_hand(rng: random.Random, size: int = 7) -> Hand:
+    return Hand(rng.sample(CARDS, size))
+
+
+def _hand_and_held_rank(rng: random.Random) -> tp.Tuple[Hand, int]:
+    hand = _dealt_hand(rng)
+    return hand, rng.choice(hand.stack).rank
+
+
+def _game_turn(rng: random.Random):
+    """An AI turn a few moves into a four player headless game."""
+    game = HeadlessGoFish(build_ai_players([ai_strategy] * 4), random.Random(rng.getrandbits(32)))
+    game.new_game()
+    turn = game.next_turn()
+    for _ in range(rng.randrange(8)):
+        if game.game_over():
+            break
+        turn.execute()
+        turn = game.next_turn(turn)
+    return turn
+
+
+def _game(num_players: int) -> tp.Callable[[random.Random], HeadlessGoFish]:
+    rules = Rules.for_table(num_players)
+
+    def setup(rng: random.Random) -> HeadlessGoFish:
+        game = HeadlessGoFish(build_ai_players([ai_strategy] * num_players), rules=rules)
+        game.rng.seed(rng.getrandbits(64))
+        return game
+    return setup
+
+
+def _ai_choose(turn):
+    turn.opponent = None
+    ai_choose_card(turn)
+
+
+def core_cases() -> tp.List[Case]:
+    return [
+        Case('deck.init', lambda rng: random.Random(rng.getrandbits(32)), Deck, 2000, 30),
+        Case('deck.reset', _shuffled_deck, Deck.reset, 2000, 30),
+        Case('deck.shuffle_deck', _shuffled_deck, Deck.shuffle_deck, 2000, 30),
+        Case('deck.deal_hands', lambda rng: (_shuffled_deck(rng), [Hand() for _ in range(4)]),
+             lambda s: s[0].deal_hands(*s[1]), 2000, 30),
+        Case('hand.has_match', lambda rng: (_dealt_hand(rng), rng.choice(CARDS)),
+             lambda s: s[0].has_match(s[1]), 5000, 30),
+        Case('hand.pop_card', _hand_and_held_rank, lambda s: s[0].pop_card(s[1]), 5000, 30),
+        Case('hand.extract_pairs', _dealt_hand, Hand.extract_pairs, 5000, 30),
+        Case('hand.add_to_hand', lambda rng: (_dealt_hand(rng), rng.choice(CARDS)),
+             lambda s: s[0].add_to_hand(s[1]), 5000, 30),
+        Case('turn.ai_choose_card', _game_turn, _ai_choose, 200, 20),
+    ]
+
+
+def game_cases(player_counts: tp.Iterable[int]) -> tp.List[Case]:
+    return [Case(f'game.play[{n}p]', _game(n), HeadlessGoFish.play, 1, 300) for n in player_counts]
+
+
+def run(cases: tp.Sequence[Case], seed: int = 0, scale: float = 1.0,
+        out: tp.Optional[tp.TextIO] = sys.stdout) -> tp.List[Result]:
+    results = []
+    if out:
+        print(f'{"case":<22}{"ops/s":>12}{"p50 us":>10}{"p90 us":>10}{"p99 us":>10}'
+              f'{"peak B":>10}{"net B":>9}', file=out)
+    for case in cases:
+        r = run_case(case, seed, scale)
+        results.append(r)
+        if out:
+            print(f'{r.name:<22}{r.ops_per_sec:>12,.0f}{r.p50_ns / 1e3:>10.2f}'
+                  f'{r.p90_ns / 1e3:>10.2f}{r.p99_ns / 1e3:>10.2f}{r.peak_bytes:>10.0f}'
+                  f'{r.net_bytes:>9.0f}', file=out)
+    return results
+
+
+def save_baseline(path: str, results: tp.Sequence[Result]):
+    data = {'python': platform.python_version(), 'machine': platform.machine(),
+            'results': {r.name: r._asdict() for r in results}}
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=1)
+
+
+def compare(path: str, results: tp.Sequence[Result], tolerance: float = 0.1,
+            out: tp.TextIO = sys.stdout) -> tp.List[str]:
+    """Print median ops/sec against a saved baseline and return the cases slower than tolerance."""
+    with open(path) as f:
+        baseline = json.load(f)['results']
+    slower = []
+    print(f'{"case":<22}{"baseline":>12}{"now":>12}{"change":>9}', file=out)
+    for r in results:
+        if r.name not in baseline:
+            continue
+        old = 1e9 / baseline[r.name]['p50_ns']
+        now = 1e9 / r.p50_ns
+        change = now / old - 1
+        flag = ''
+        if change < -tolerance:
+            slower.append(r.name)
+            flag = '  SLOWER'
+        elif change > tolerance:
+            flag = '  faster'
+        print(f'{r.name:<22}{old:>12,.0f}{now:>12,.0f}{change:>+9.1%}{flag}', file=out)
+    return slower
+
+
+def main(argv: tp.Optional[tp.Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='gofish.bench', description=__doc__.splitlines()[1])
+    parser.add_argument('-k', '--only', default='*', help='glob of case names to run')
+    parser.add_argument('--players', type=int, nargs='+',
+                        default=list(range(2, GOFISH_MAX_PLAYERS + 1)))
+    parser.add_argument('--scale', type=float, default=1.0, help='multiply batch sizes and repeats')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--save', metavar='JSON', help='write the results as a baseline')
+    parser.add_argument('--compare', metavar='JSON', help='compare against a saved baseline')
+    parser.add_argument('--tolerance', type=float, default=0.1,
+                        help='relative slowdown reported as a regression')
+    args = parser.parse_args(argv)
+    cases = [c for c in core_cases() + game_cases(args.players)
+             if fnmatch.fnmatch(c.name, args.only)]
+    results = run(cases, args.seed, args.scale)
+    if args.save:
+        save_baseline(args.save, results)
+    if args.compare:
+        print()
+        if compare(args.compare, results, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,263 @@
+"""
+Compact card encoding for bulk simulations.
+
+A card is an int 0-51 with rank ``i // 4 + 1`` and suit ``SUITS[i % 4]``, so the
+four cards of a rank share one nibble of a 52-bit hand mask. Decks are
+``array('B')`` buffers of card indexes. ``Card`` objects are only materialised
+by ``to_card``/``mask_cards`` (lookups into ``card.CARDS``) for display.
+"""
+import array
+import random
+import typing as tp
+
+from gofish.card import CARDS, Card, Suit, GOFISH_HAND_SIZE
+from gofish.engine import GameResult, winning_seat
+from gofish.turn import TurnOutcomes
+
+SUITS = tuple(Suit)
+NUM_CARDS = 52
+FULL_MASK = (1 << NUM_CARDS) - 1
+RANKS = range(1, 14)
+# Index 0 is unused so masks can be looked up by Card rank
+RANK_MASKS = (0, *(0xF << ((r - 1) * 4) for r in RANKS))
+INDEX_RANK = tuple(i // 4 + 1 for i in range(NUM_CARDS))
+_NIBBLE_BITS = tuple(bin(n).count('1') for n in range(16))
+_ORDERED = array.array('B', range(NUM_CARDS))
+
+BitStrategy = tp.Callable[['BitGame', int], tp.Tuple[int, int]]
+
+
+def card_index(card: Card) -> int:
+    return card.index
+
+
+def to_card(i: int) -> Card:
+    return CARDS[i]
+
+
+def hand_mask(cards: tp.Iterable[Card]) -> int:
+    mask = 0
+    for c in cards:
+        mask |= 1 << c.index
+    return mask
+
+
+def mask_indexes(mask: int) -> tp.Iterator[int]:
+    """Yield the card index of every set bit, lowest first."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def mask_cards(mask: int) -> tp.List[Card]:
+    return [to_card(i) for i in mask_indexes(mask)]
+
+
+def rank_count(mask: int, rank: int) -> int:
+    return _NIBBLE_BITS[(mask >> ((rank - 1) * 4)) & 0xF]
+
+
+def held_ranks(mask: int) -> tp.List[int]:
+    return [r for r in RANKS if mask & RANK_MASKS[r]]
+
+
+class BitDeck:
+    """Deck stored as a reusable byte buffer of card indexes with a moving top."""
+
+    __slots__ = ('cards', 'top', 'rng')
+
+    def __init__(self, rng: tp.Optional[random.Random] = None):
+        self.rng = rng or random.Random()
+        self.cards = array.array('B', _ORDERED)
+        self.top = 0
+        self.shuffle_deck()
+
+    def __repr__(self):
+        return f'<BitDeck: {len(self)}>'
+
+    def __len__(self):
+        return NUM_CARDS - self.top
+
+    def reset(self):
+        """Put every card back in order and reshuffle the same buffer."""
+        self.top = 0
+        self.cards[:] = _ORDERED
+        self.shuffle_deck()
+
+    def shuffle_deck(self):
+        self.rng.shuffle(self.cards)
+
+    def take_top(self) -> tp.Optional[int]:
+        if self.top >= NUM_CARDS:
+            return None
+        i = self.cards[self.top]
+        self.top += 1
+        return i
+
+    def remaining_mask(self) -> int:
+        mask = 0
+        for i in self.cards[self.top:]:
+            mask |= 1 << i
+        return mask
+
+    def deal_masks(self, num_hands: int, hand_size: int = GOFISH_HAND_SIZE) -> tp.List[int]:
+        total_dealt = hand_size * num_hands
+        if total_dealt > len(self):
+            raise ValueError(f'Cannot deal {hand_size} cards to {num_hands} hands.')
+        masks = [0] * num_hands
+        for n, i in enumerate(self.cards[self.top:self.top + total_dealt]):
+            masks[n % num_hands] |= 1 << i
+        self.top += total_dealt
+        return masks
+
+
+def random_strategy(game: 'BitGame', seat: int) -> tp.Tuple[int, int]:
+    """Ask a random opponent for the rank of a random card in hand."""
+    rng = game.rng
+    i = rng.choice([*mask_indexes(game.hands[seat])])
+    opp = rng.randrange(game.num_players - 1)
+    return INDEX_RANK[i], opp if opp < seat else opp + 1
+
+
+def memory_strategy(game: 'BitGame', seat: int) -> tp.Tuple[int, int]:
+    """Mask version of ``turn.memory_strategy``: a rank an opponent failed to get, else random."""
+    hand = game.hands[seat]
+    for opp, wanted in enumerate(game.memory[seat]):
+        for r in RANKS:
+            if wanted & (1 << r) and hand & RANK_MASKS[r]:
+                return r, opp
+    return random_strategy(game, seat)
+
+
+class BitGame:
+    """
+    Headless game played on hand masks with the same rules as ``turn.Turn``.
+
+    Strategies are callables ``strategy(game, seat) -> (rank, opponent_seat)``.
+    ``memory[seat][asker]`` holds the rank bits that asker failed to get from seat.
+    """
+
+    def __init__(self, strategies: tp.Sequence[BitStrategy],
+                 rng: tp.Optional[random.Random] = None):
+        self.rng = rng or random.Random()
+        self.strategies = tuple(strategies)
+        self.num_players = len(self.strategies)
+        self.deck = BitDeck(self.rng)
+        self.hands = [0] * self.num_players
+        self.pairs = [0] * self.num_players
+        self.laid = 0
+        self.memory = [[0] * self.num_players for _ in range(self.num_players)]
+        self.order = list(range(self.num_players))
+        self.pos = 0
+        self.turns = 0
+        # Bumped on every deal so observers can tell games apart
+        self.deals = 0
+
+    def new_game(self):
+        self.deals += 1
+        self.deck.reset()
+        self.hands = self.deck.deal_masks(self.num_players)
+        self.pairs = [0] * self.num_players
+        self.laid = 0
+        for wanted in self.memory:
+            wanted[:] = [0] * self.num_players
+        self.order[:] = range(self.num_players)
+        self.rng.shuffle(self.order)
+        self.pos = 0
+        self.turns = 0
+        for seat in range(self.num_players):
+            self.collect_pairs(seat)
+
+    def load(self, hands: tp.Sequence[int], pairs: tp.Sequence[int], laid: int,
+             deck_cards: tp.Sequence[int], order: tp.Sequence[int], pos: int = 0,
+             memory: tp.Optional[tp.Sequence[tp.Sequence[int]]] = None):
+        """Set up a game in progress, with deck_cards listed from the top down."""
+        self.hands = list(hands)
+        self.pairs = list(pairs)
+        self.laid = laid
+        self.deck.top = NUM_CARDS - len(deck_cards)
+        self.deck.cards[self.deck.top:] = array.array('B', deck_cards)
+        self.order[:] = order
+        self.pos = pos
+        for seat, wanted in enumerate(self.memory):
+            wanted[:] = memory[seat] if memory else [0] * self.num_players
+
+    @property
+    def active(self) -> int:
+        return self.order[self.pos]
+
+    def game_over(self) -> bool:
+        return not len(self.deck) or not all(self.hands)
+
+    def collect_pairs(self, seat: int):
+        hand = self.hands[seat]
+        for r in RANKS:
+            held = hand & RANK_MASKS[r]
+            while _NIBBLE_BITS[held >> ((r - 1) * 4)] > 1:
+                first = held & -held
+                held ^= first
+                second = held & -held
+                held ^= second
+                hand ^= first | second
+                self.laid |= first | second
+                self.pairs[seat] += 1
+        self.hands[seat] = hand
+
+    def ask(self, seat: int, opp: int, rank: int) -> TurnOutcomes:
+        """Resolve one turn of seat asking opp for rank and return its outcome."""
+        rank_mask = RANK_MASKS[rank]
+        held = self.hands[opp] & rank_mask
+        if held:
+            card = held & -held
+            self.hands[opp] ^= card
+            self.hands[seat] |= card
+            outcome = TurnOutcomes.ASKED_MATCH
+        else:
+            self.memory[opp][seat] |= 1 << rank
+            i = self.deck.take_top()
+            card = 1 << i
+            if card & rank_mask:
+                outcome = TurnOutcomes.FISH_MATCH
+            elif self.hands[seat] & RANK_MASKS[INDEX_RANK[i]]:
+                outcome = TurnOutcomes.FISH_OTHER
+            else:
+                outcome = TurnOutcomes.FISH_NONE
+            self.hands[seat] |= card
+        self.collect_pairs(seat)
+        return outcome
+
+    def play_move(self, rank: int, opp: int) -> TurnOutcomes:
+        """Play the active seat's turn with the given decision and pass the turn on if it ends."""
+        outcome = self.ask(self.order[self.pos], opp, rank)
+        if outcome.extra_turns():
+            self.pos = (self.pos + 1) % self.num_players
+        self.turns += 1
+        return outcome
+
+    def step(self) -> TurnOutcomes:
+        seat = self.order[self.pos]
+        return self.play_move(*self.strategies[seat](self, seat))
+
+    def play(self) -> tp.List[int]:
+        self.new_game()
+        while not self.game_over():
+            self.step()
+        return self.pairs
+
+
+def simulate(n_games: int, seed: tp.Optional[int] = None, num_players: int = 4,
+             strategies: tp.Optional[tp.Sequence[BitStrategy]] = None) -> tp.List[GameResult]:
+    """Mask-based counterpart of ``engine.simulate``."""
+    if strategies is None:
+        strategies = [memory_strategy] * num_players
+    seeds = random.Random(seed)
+    game = BitGame(strategies)
+    results = []
+    for n in range(n_games):
+        game_seed = seeds.getrandbits(64)
+        game.rng.seed(game_seed)
+        pairs = game.play()
+        results.append(GameResult(n, game_seed, winning_seat(pairs), tuple(pairs), game.turns,
+                                  tuple(game.order)))
+    return results
@@ -5,17 +5,13 @@ import random
 import typing as tp
 
 import gofish.recipes as recipes
+from gofish.rules import DEFAULT_RULES, Rules
 
-GOFISH_HAND_SIZE = 7
-GOFISH_MAX_PLAYERS = 5
-
-
-def set_globals():
-    global GOFISH_HAND_SIZE
-    global GOFISH_MAX_PLAYERS
-
-
-set_globals()
+# Classic table limits, see rules.Rules for other tables
+GOFISH_HAND_SIZE = DEFAULT_RULES.hand_size
+GOFISH_MAX_PLAYERS = DEFAULT_RULES.max_players
+# The user takes one of the seats
+GOFISH_MAX_AI = GOFISH_MAX_PLAYERS - 1
 
 
 class Suit(enum.Enum):
@@ -33,7 +29,14 @@ class Suit(enum.Enum):
 
 
 class Card:
-    """Class representing a single playing card"""
+    """
+    Class representing a single playing card.
+
+    Cards are immutable flyweights: ``Card(rank, suit)`` always returns the same
+    instance from ``CARDS``, so equality is identity and the hash is precomputed.
+    """
+
+    __slots__ = ('rank', 'suit', 'index', '_hash')
 
     FACES = {
         11: 'J',
@@ -41,13 +44,36 @@ class Card:
         13: 'K',
         1: 'A'
     }
+    _interned: tp.Dict[tp.Tuple[int, Suit], 'Card'] = {}
 
-    def __init__(self, rank: int, suit: Suit):
-        self.rank = rank
-        self.suit = suit
+    def __new__(cls, rank: int, suit: Suit):
+        try:
+            return cls._interned[rank, suit]
+        except KeyError:
+            pass
+        if rank not in range(1, 14) or not isinstance(suit, Suit):
+            raise ValueError(f'No such card: {rank!r} of {suit!r}')
+        obj = super().__new__(cls)
+        setattr_ = super(Card, obj).__setattr__
+        setattr_('rank', rank)
+        setattr_('suit', suit)
+        setattr_('index', (rank - 1) * 4 + list(Suit).index(suit))
+        # Hash by index so set and dict order never depends on PYTHONHASHSEED
+        setattr_('_hash', hash(obj.index))
+        cls._interned[rank, suit] = obj
+        return obj
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f'{self!r} is immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError(f'{self!r} is immutable')
+
+    def __reduce__(self):
+        return self.__class__, (self.rank, self.suit)
 
     def __hash__(self) -> int:
-        return hash((self.rank, self.suit))
+        return self._hash
 
     def __repr__(self):
         return f'Card({self.rank}{self.suit!s})'
@@ -60,10 +86,10 @@ class Card:
         return f'|{rank}{self.suit!s}|'
 
     def __eq__(self, other):
-        return hash(self) == hash(other)
+        return self is other
 
     def __ne__(self, other):
-        return not self == other
+        return self is not other
 
     def __ge__(self, other):
         return self.rank >= other.rank
@@ -96,45 +122,59 @@ class Card:
             return False
 
 
+# The 52 shared Card instances, ordered so that CARDS[i].index == i
+CARDS: tp.Tuple[Card, ...] = tuple(itt.starmap(Card, itt.product(range(1, 14), Suit)))
+
+
 class Hand:
+    """Cards held by a player, bucketed by rank so lookups never scan the hand."""
+
     def __init__(self, cards: tp.Optional[tp.Sequence[Card]] = None):
-        if cards is None:
-            cards = []
-        self.stack: tp.Deque[Card] = coll.deque(cards)
+        # Index 0 is unused so a Card's rank is its bucket index
+        self._ranks: tp.List[tp.List[Card]] = [[] for _ in range(14)]
+        self._count = 0
+        # Ranks currently holding at least one pair
+        self._paired: tp.Set[int] = set()
+        if cards:
+            self.add_to_hand(*cards)
 
     def __repr__(self):
-        return f'<Hand: {self.count} cards>'
+        return f'<Hand: {self._count} cards>'
 
     def __iter__(self):
-        return iter(self.stack)
+        return recipes.flatten(self._ranks)
 
     def __len__(self):
-        return len(self.stack)
+        return self._count
+
+    @property
+    def stack(self) -> tp.List[Card]:
+        """Cards in hand ordered by rank."""
+        return [*self]
 
-    def sort(self):
-        sorted_hand = sorted(self.stack)
-        self.stack = coll.deque(sorted_hand)
+    def extract_pairs(self, set_size: int = 2):
+        """
+        Remove and return every set of set_size same rank cards, 2 for pairs or 4 for books.
+
+        Only ranks that gained a card since the last call while holding two or
+        more are visited.
+        """
 
-    def extract_pairs(self):
-        self.sort()
-        grouped = [list(grp) for _, grp in itt.groupby(self.stack, key=lambda x: x.rank)]
-        grouped = filter(lambda x: len(x) > 1, grouped)
         pairs = []
-        for group in grouped:
-            for pair in recipes.grouper(group, 2):
-                pairs.append(tuple(self.take_from_hand(*pair)))
+        for rank in self._paired:
+            bucket = self._ranks[rank]
+            while len(bucket) >= set_size:
+                pairs.append(tuple(bucket[-1:-set_size - 1:-1]))
+                del bucket[-set_size:]
+                self._count -= set_size
+        self._paired.clear()
         return pairs
-        # for c in self.stack:
-        #     dups[c.rank].append(c)
-        # for dup_rank in filter(lambda x: len(x) > 1, dups.values()):
-        #     removed = self.take_from_hand(*dup_rank)
-        #     yield recipes.pairwise(removed)
-
-    def pop_card(self, n: int) -> Card:
-        """Pop out card at index n."""
-        self.stack.rotate(-n)
-        obj = self.stack.popleft()
-        self.stack.rotate(n)
+
+    def pop_card(self, rank: int) -> Card:
+        """Pop out a card of the given rank."""
+
+        obj = self._ranks[rank].pop()
+        self._count -= 1
         return obj
 
     def add_to_hand(self, *cards: Card):
@@ -142,39 +182,61 @@ class Hand:
             not_card = [*itt.filterfalse(lambda x: isinstance(x, Card), cards)]
             if not_card:
                 raise TypeError('Non-Card object in parameter cards in Hand.__init__')
-            self.stack.extend(cards)
+            for c in cards:
+                bucket = self._ranks[c.rank]
+                bucket.append(c)
+                if len(bucket) > 1:
+                    self._paired.add(c.rank)
+            self._count += len(cards)
 
-    def has_match(self, other_card: Card):
-        """Check if other card is in hand and, if so, return its index else None."""
+    def has_match(self, other_card: Card) -> tp.Optional[Card]:
+        """Return a card in hand with the same rank as other card else None."""
 
-        for c in self.stack:
-            if c.same_rank(other_card):
-                return self.stack.index(c)
-        return None
+        try:
+            bucket = self._ranks[other_card.rank]
+        except AttributeError:
+            return None
+        return bucket[-1] if bucket else None
+
+    def rank_card(self, rank: int) -> tp.Optional[Card]:
+        """Return a card of rank in hand else None."""
+        bucket = self._ranks[rank]
+        return bucket[-1] if bucket else None
+
+    def rank_count(self, rank: int) -> int:
+        """Number of cards of rank in hand."""
+        return len(self._ranks[rank])
 
     def take_from_hand(self, *cards: Card):
         taken = []
         for c in cards:
             try:
-                taken.append(self.pop_card(self.stack.index(c)))
-            except IndexError:
+                self._ranks[c.rank].remove(c)
+            except ValueError:
                 continue
+            self._count -= 1
+            taken.append(c)
         return taken
 
     def clear_hand(self):
-        self.stack.clear()
+        for bucket in self._ranks:
+            bucket.clear()
+        self._paired.clear()
+        self._count = 0
 
     def count(self) -> int:
         """Show remaining count of cards in hand."""
-        return len(self.stack)
+        return self._count
 
 
 # noinspection PyShadowingNames
 class Deck:
     """Class composed of Cards representing a card_stack of cards."""
 
-    def __init__(self):
-        self.stack = coll.deque(self.get_standard_deck())
+    def __init__(self, rng: tp.Optional[random.Random] = None, rules: Rules = DEFAULT_RULES):
+        self.rng = rng or random.Random()
+        self.rules = rules
+        self.stack = coll.deque(CARDS * rules.num_decks)
         self.shuffle_deck()
 
     def __str__(self):
@@ -195,19 +257,19 @@ class Deck:
         return len(self.stack)
 
     def reset(self):
-        d = self.__class__()
+        """Gather the shared Card instances back into the deck and reshuffle."""
         self.stack.clear()
-        self.stack.extend(d)
+        self.stack.extend(CARDS * self.rules.num_decks)
+        self.shuffle_deck()
 
     @staticmethod
     def get_standard_deck():
-        return list(itt.starmap(Card, itt.product(range(1, 14), Suit)))
-        # return [Card(r, s) for r, s in itt.product(Rank.values(), Suit)]
+        return list(CARDS)
 
     def shuffle_deck(self, cut: int = 26):
         """Shuffle cards in deck."""
 
-        self.stack = coll.deque(random.sample(self.stack, k=len(self.stack)))
+        self.stack = coll.deque(self.rng.sample(self.stack, k=len(self.stack)))
         self.stack.rotate(-cut)
 
     def take_top(self) -> Card:
@@ -221,15 +283,10 @@ class Deck:
     def deal_hands(self, *hands: Hand):
         if not hands:
             raise RuntimeError('No Hand objects were given.')
-        hand_size = GOFISH_HAND_SIZE
-        num_hands = len(hands)
-        total_dealt = hand_size * num_hands
+        self.rules.check_players(len(hands))
+        total_dealt = self.rules.hand_size * len(hands)
         if total_dealt > len(self):
-            toss = num_hands - GOFISH_MAX_PLAYERS
-            print(f'Too many Hand objects given ({num_hands}). Removing {toss}')
-            num_hands -= toss
-
-        # _hands = list(Hand() for _ in range(num_hands))
+            raise ValueError(f'Cannot deal {len(hands)} hands from {len(self)} cards.')
         cycle_hands = itt.cycle(hands)
         for c in itt.islice(self, total_dealt):
             next(cycle_hands).add_to_hand(c)
@@ -0,0 +1,260 @@
+"""
+Exact endgame search for the last few cards of the deck.
+
+Once pairs are collected a hand holds at most one card of each rank, so suits
+never matter again: a position is a rank mask per seat, the count of each rank
+left in the deck and the seat to move. Seats are numbered in turn order, seat 0
+moving first. Draws are chance nodes weighted by the deck counts, and every
+seat picks the ask maximising its own expected pairs from here on (max-n), so
+values only depend on the position and are memoized in a transposition table
+under incrementally updated Zobrist keys.
+"""
+import random
+import time
+import typing as tp
+
+from gofish.rules import EndCondition
+
+if tp.TYPE_CHECKING:
+    from gofish.beliefs import CardTracker
+    from gofish.player import AnyPlayer
+    from gofish.rules import Rules
+
+ENDGAME_DECK_SIZE = 2
+# Larger tables search too many positions to answer within a turn
+ENDGAME_MAX_SEATS = 5
+RANKS = range(1, 14)
+
+Action = tp.Tuple[int, int]
+Values = tp.Tuple[float, ...]
+
+# Fixed seed so keys, and with them the search, are the same in every process
+_zobrist = random.Random(0x60F15)
+_Z_HAND = tuple(tuple(_zobrist.getrandbits(64) for _ in range(14))
+                for _ in range(ENDGAME_MAX_SEATS))
+_Z_DECK = tuple(tuple(_zobrist.getrandbits(64) for _ in range(5)) for _ in range(14))
+_Z_TURN = tuple(_zobrist.getrandbits(64) for _ in range(ENDGAME_MAX_SEATS))
+
+
+def zobrist_key(hands: tp.Sequence[int], deck: tp.Sequence[int], seat: int = 0) -> int:
+    """Key of a position from scratch, ``EndgameSolver`` updates it move by move."""
+    key = _Z_TURN[seat]
+    for s, mask in enumerate(hands):
+        for r in RANKS:
+            if mask & (1 << r):
+                key ^= _Z_HAND[s][r]
+    for r in RANKS:
+        key ^= _Z_DECK[r][deck[r]]
+    return key
+
+
+def sample_hidden(tracker: 'CardTracker', rng: random.Random, tries: int = 20
+                  ) -> tp.Optional[tp.Tuple[tp.Dict['AnyPlayer', int], tp.List[int]]]:
+    """
+    Deal the unseen cards to the opponents' unknown slots and the deck at random.
+
+    Honours known ranks, denied ranks and the one-card-per-rank hands, dropping
+    the denied ranks on the last try. Returns ``(rank mask per opponent, deck
+    counts)``, or ``None`` if no consistent deal was found.
+    """
+    pool = [r for r in RANKS for _ in range(tracker.unseen[r])]
+    for attempt in range(tries):
+        strict = attempt < tries - 1
+        rng.shuffle(pool)
+        rest = pool
+        hands = {}
+        for opp in tracker.opponents:
+            mask = tracker.certain[opp]
+            blocked = mask | tracker.excluded[opp] if strict else mask
+            need = tracker.unknown(opp)
+            keep = []
+            for r in rest:
+                if need and not blocked & (1 << r):
+                    mask |= 1 << r
+                    blocked |= 1 << r
+                    need -= 1
+                else:
+                    keep.append(r)
+            if need:
+                break
+            hands[opp] = mask
+            rest = keep
+        else:
+            deck = [0] * 14
+            for r in rest:
+                deck[r] += 1
+            return hands, deck
+    return None
+
+
+class EndgameSolver:
+    """
+    Exact max-n/expectimax search with a transposition table.
+
+    AiPlayers switch to ``choose`` once the deck holds ``threshold`` cards or
+    fewer. Hidden cards are dealt ``samples`` times from the player's beliefs
+    and each deal is solved exactly, the ask with the best average wins.
+
+    :param threshold: largest deck size searched.
+    :param samples: deals of the hidden cards averaged per decision.
+    :param max_entries: table size at which it is cleared.
+    """
+
+    def __init__(self, threshold: int = ENDGAME_DECK_SIZE, samples: int = 4,
+                 max_entries: int = 1 << 20):
+        self.threshold = threshold
+        self.samples = samples
+        self.max_entries = max_entries
+        self.table: tp.Dict[int, Values] = {}
+        self.nodes = 0
+        self.probes = 0
+        self.hits = 0
+        self.elapsed = 0.0
+
+    @property
+    def nodes_per_second(self) -> float:
+        return self.nodes / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.probes if self.probes else 0.0
+
+    def clear(self):
+        """Drop the table and the counters."""
+        self.table.clear()
+        self.nodes = self.probes = self.hits = 0
+        self.elapsed = 0.0
+
+    @staticmethod
+    def supports(rules: 'Rules', num_players: int) -> bool:
+        """Whether a table fits the search: one deck, pairs, the classic ending, five seats."""
+        return (rules.num_decks == 1 and rules.set_size == 2 and rules.end is EndCondition.FIRST_OUT
+                and num_players <= ENDGAME_MAX_SEATS)
+
+    def choose(self, turn) -> tp.Tuple[int, 'AnyPlayer']:
+        """Return ``(rank, opponent)`` for the active AiPlayer of an object-engine Turn."""
+        tracker = turn.active.beliefs
+        seats = (turn.active, *turn.game.turn_order)
+        totals: tp.Dict[Action, float] = {}
+        for _ in range(self.samples):
+            dealt = sample_hidden(tracker, turn.game.rng)
+            if dealt is None:
+                continue
+            opp_hands, deck = dealt
+            hands = [tracker.certain[turn.active], *(opp_hands[p] for p in seats[1:])]
+            for action, values in self.action_values(hands, deck).items():
+                totals[action] = totals.get(action, 0.0) + values[0]
+        if not totals:
+            return tracker.best_ask(seats[1:])
+        rank, opp = max(totals, key=totals.get)
+        return rank, seats[opp]
+
+    def action_values(self, hands: tp.Sequence[int], deck: tp.Sequence[int]
+                      ) -> tp.Dict[Action, Values]:
+        """
+        Expected future pairs per seat after each ask of seat 0.
+
+        :param hands: rank mask (bits ``1 << rank``) per seat in turn order.
+        :param deck: count of each rank left in the deck, indexed by rank.
+        """
+        start = time.perf_counter()
+        hands = list(hands)
+        deck = list(deck)
+        key = zobrist_key(hands, deck)
+        left = sum(deck)
+        values = {}
+        for r in RANKS:
+            if hands[0] & (1 << r):
+                miss = None
+                for opp in range(1, len(hands)):
+                    if hands[opp] & (1 << r):
+                        values[r, opp] = self._hit(hands, deck, left, 0, r, opp, key)
+                    else:
+                        if miss is None:
+                            miss = self._miss(hands, deck, left, 0, r, key)
+                        values[r, opp] = miss
+        self.elapsed += time.perf_counter() - start
+        return values
+
+    def best_move(self, hands: tp.Sequence[int], deck: tp.Sequence[int]) -> Action:
+        """The ask seat 0 makes under exact play, ``(rank, opponent_seat)``."""
+        values = self.action_values(hands, deck)
+        return max(values, key=lambda a: values[a][0])
+
+    def _value(self, hands: tp.List[int], deck: tp.List[int], left: int, seat: int,
+               key: int) -> Values:
+        self.probes += 1
+        found = self.table.get(key)
+        if found is not None:
+            self.hits += 1
+            return found
+        self.nodes += 1
+        n = len(hands)
+        mine = hands[seat]
+        best = None
+        for r in RANKS:
+            bit = 1 << r
+            if not mine & bit:
+                continue
+            missed = False
+            for k in range(1, n):
+                opp = (seat + k) % n
+                if hands[opp] & bit:
+                    values = self._hit(hands, deck, left, seat, r, opp, key)
+                elif missed:
+                    # Every miss on a rank leads to the same draws
+                    continue
+                else:
+                    missed = True
+                    values = self._miss(hands, deck, left, seat, r, key)
+                if best is None or values[seat] > best[seat]:
+                    best = values
+        if len(self.table) >= self.max_entries:
+            self.table.clear()
+        self.table[key] = best
+        return best
+
+    def _hit(self, hands: tp.List[int], deck: tp.List[int], left: int, seat: int,
+             rank: int, opp: int, key: int) -> Values:
+        """Seat takes rank from opp, lays the pair and goes again."""
+        bit = 1 << rank
+        mine, theirs = hands[seat], hands[opp]
+        if mine ^ bit and theirs ^ bit:
+            hands[seat], hands[opp] = mine ^ bit, theirs ^ bit
+            values = self._value(hands, deck, left, seat,
+                                 key ^ _Z_HAND[seat][rank] ^ _Z_HAND[opp][rank])
+            hands[seat], hands[opp] = mine, theirs
+        else:
+            values = (0.0,) * len(hands)
+        return tuple(v + 1.0 if s == seat else v for s, v in enumerate(values))
+
+    def _miss(self, hands: tp.List[int], deck: tp.List[int], left: int, seat: int,
+              rank: int, key: int) -> Values:
+        """Expected future pairs per seat after seat asked for rank and goes fishing."""
+        n = len(hands)
+        total = [0.0] * n
+        mine = hands[seat]
+        nxt = (seat + 1) % n
+        z_hand = _Z_HAND[seat]
+        for d in RANKS:
+            count = deck[d]
+            if not count:
+                continue
+            dbit = 1 << d
+            deck[d] = count - 1
+            hands[seat] = mine ^ dbit
+            to_move = seat if d == rank else nxt
+            if left > 1 and hands[seat] and all(hands):
+                child = key ^ _Z_DECK[d][count] ^ _Z_DECK[d][count - 1] ^ z_hand[d]
+                values = self._value(hands, deck, left - 1, to_move,
+                                     child ^ _Z_TURN[seat] ^ _Z_TURN[to_move])
+            else:
+                values = (0.0,) * n
+            deck[d] = count
+            p = count / left
+            for s in range(n):
+                total[s] += p * values[s]
+            if mine & dbit:
+                total[seat] += p
+        hands[seat] = mine
+        return tuple(total)
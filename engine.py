@@ -0,0 +1,148 @@
+"""Headless Go Fish engine: every seat is an AI strategy and nothing touches the terminal."""
+import collections as coll
+import random
+import typing as tp
+
+from gofish.events import EventSink
+from gofish.game_logic import GoFish, randomize_turns
+from gofish.interaction import MessageQueue, NullSink
+from gofish.player import AiPlayer
+from gofish.rules import DEFAULT_RULES, Rules
+from gofish.turn import Strategy, Turn, ai_strategy
+
+
+class GameResult(coll.namedtuple('GameResult', 'game seed winner pairs turns order')):
+    """
+    One finished game: ``pairs`` per seat and ``order``, the seats in the turn
+    order the game started with. ``winner`` is the seat with the most pairs,
+    None when several seats tie for it.
+    """
+
+    __slots__ = ()
+
+    def win_share(self, seat: int) -> float:
+        """Seat's share of the win, seats tied for the most pairs split it."""
+        best = max(self.pairs)
+        return 1 / self.pairs.count(best) if self.pairs[seat] == best else 0.0
+
+
+def winning_seat(pairs: tp.Sequence[int]) -> tp.Optional[int]:
+    """Seat with the most pairs, None on a tie."""
+    best = max(pairs)
+    return pairs.index(best) if pairs.count(best) == 1 else None
+
+
+class HeadlessTurn(Turn):
+    """Turn without screen clearing, stat printing or answer prompts."""
+
+    def enter(self):
+        self.choose()
+        return self
+
+    def check_answer(self, matched: bool):
+        pass
+
+
+class HeadlessGoFish(GoFish):
+    messages = MessageQueue([NullSink()])
+    turn_class = HeadlessTurn
+
+    def __init__(self, players: tp.Sequence[AiPlayer], rng: tp.Optional[random.Random] = None,
+                 rules: Rules = DEFAULT_RULES):
+        super().__init__(players, rng, rules)
+        self.start_order: tp.Tuple[int, ...] = ()
+
+    def new_game(self, first=False):
+        """
+        Reuse the seated players and deck for a fresh deal.
+
+        The deal and seat order only depend on the state of ``rng`` at this point,
+        so seeding it right before ``play`` reproduces the game.
+        """
+        self.deck.reset()
+        for p in self.players:
+            p.reset()
+        self.turn_order = randomize_turns(self.players, self.rng)
+        self.start_order = tuple(self.players.index(p) for p in self.turn_order)
+        super().new_game(first=True)
+
+    def score_game(self):
+        ranked = sorted(self.players, key=lambda x: x.num_pairs, reverse=True)
+        self.announce_end(ranked)
+        return ranked
+
+    def print_scores(self, sorted_players):
+        pass
+
+
+def build_ai_players(strategies: tp.Sequence[tp.Optional[Strategy]]) -> tp.Tuple[AiPlayer, ...]:
+    return tuple(AiPlayer(n, s) for n, s in enumerate(strategies, start=1))
+
+
+def play_games(n_games: int, seed: tp.Optional[int] = None, num_players: int = 4,
+               strategies: tp.Optional[tp.Sequence[Strategy]] = None,
+               events: tp.Sequence[EventSink] = (), hooks=None,
+               rules: Rules = DEFAULT_RULES) -> tp.Iterator[GameResult]:
+    """
+    Play ``n_games`` headless games, yielding one GameResult per game as it ends.
+
+    :param n_games: number of games to play.
+    :param seed: master seed the per-game seeds are drawn from, ``None`` for an unseeded run.
+    :param num_players: number of seats, ignored when strategies are given.
+    :param strategies: one Strategy per seat, defaults to the built-in AI.
+    :param events: sinks receiving every game event, e.g. an ``events.EventLog``.
+    :param hooks: ``instrument.TurnHooks`` wrapped around every turn.
+    :param rules: table rules, e.g. ``Rules.for_table(24)`` for a large multi-deck table.
+    """
+    if strategies is None:
+        strategies = [ai_strategy] * num_players
+    seeds = random.Random(seed)
+    game = HeadlessGoFish(build_ai_players(strategies), rules=rules)
+    game.events.extend(events)
+    game.hooks = hooks
+    for n in range(n_games):
+        game_seed = seeds.getrandbits(64)
+        game.rng.seed(game_seed)
+        game.play()
+        pairs = tuple(p.num_pairs for p in game.players)
+        yield GameResult(n, game_seed, winning_seat(pairs), pairs, game.turns, game.start_order)
+
+
+def play_duplicate(n_deals: int, seed: tp.Optional[int] = None,
+                   strategies: tp.Sequence[Strategy] = (ai_strategy, ai_strategy),
+                   events: tp.Sequence[EventSink] = (), hooks=None,
+                   rules: Rules = DEFAULT_RULES) -> tp.Iterator[tp.List[GameResult]]:
+    """
+    Play every deal once per rotation of strategies through the seats.
+
+    Game ``k`` of a deal seats ``strategies[(seat - k) % n]`` at each seat and
+    reseeds ``rng`` with the deal's seed, so all n games share the shuffled deck
+    and the seat order. Yields the n GameResults of a deal together.
+    """
+    n = len(strategies)
+    seeds = random.Random(seed)
+    game = HeadlessGoFish(build_ai_players(strategies), rules=rules)
+    game.events.extend(events)
+    game.hooks = hooks
+    played = 0
+    for _ in range(n_deals):
+        deal_seed = seeds.getrandbits(64)
+        block = []
+        for k in range(n):
+            for seat, p in enumerate(game.players):
+                p.strategy = strategies[(seat - k) % n]
+            game.rng.seed(deal_seed)
+            game.play()
+            pairs = tuple(p.num_pairs for p in game.players)
+            block.append(GameResult(played, deal_seed, winning_seat(pairs), pairs, game.turns,
+                                    game.start_order))
+            played += 1
+        yield block
+
+
+def simulate(n_games: int, seed: tp.Optional[int] = None, num_players: int = 4,
+             strategies: tp.Optional[tp.Sequence[Strategy]] = None,
+             events: tp.Sequence[EventSink] = (), hooks=None,
+             rules: Rules = DEFAULT_RULES) -> tp.List[GameResult]:
+    """Play ``n_games`` headless games and return one GameResult per game, see ``play_games``."""
+    return list(play_games(n_games, seed, num_players, strategies, events, hooks, rules))
@@ -0,0 +1,133 @@
+"""
+Event-sourced game log.
+
+``GoFish`` emits one fixed-width record per game event to every sink in its
+``events`` list. ``EventLog`` packs them into a reusable block buffer and
+writes whole blocks to disk, ``read_events``/``read_blocks`` scan them back.
+
+Record layout, little endian, ``RECORD.size`` bytes:
+
+========  ======  ==============================================
+field     type    meaning
+========  ======  ==============================================
+game      uint32  game number within the log
+turn      uint16  turn number within the game
+kind      uint8   ``EventKind``
+seat      uint8   seat index in ``GoFish.players``
+a, b      uint8   event arguments, see ``EventKind``
+========  ======  ==============================================
+"""
+import abc
+import collections as coll
+import enum
+import os
+import struct
+import typing as tp
+
+RECORD = struct.Struct('<IHBBBB')
+HEADER = struct.Struct('<4sBB2x')
+MAGIC = b'GFEV'
+VERSION = 1
+# Argument value for no card or no seat
+NONE = 0xFF
+
+Event = coll.namedtuple('Event', 'game turn kind seat a b')
+
+
+class EventKind(enum.IntEnum):
+    """Event types and the meaning of their ``a``/``b`` arguments."""
+    #: seat asked seat ``a`` for rank ``b``
+    ASK = 1
+    #: seat gave card index ``a`` to seat ``b``, ``a`` is NONE to go fish
+    RESPONSE = 2
+    #: seat drew card index ``a`` with ``TurnOutcomes`` value ``b``, ``IN_PROGRESS``
+    #: for the draw of an empty hand under ``DECK_OUT`` rules
+    DRAW = 3
+    #: seat laid down card indexes ``a`` and ``b``
+    PAIR = 4
+    #: seat becomes active after seat ``a`` ended a turn with outcome ``b``
+    TURN = 5
+    #: seat won with ``a`` pairs out of ``b`` players
+    GAME_END = 6
+
+
+class EventSink(abc.ABC):
+    """Receives every event of the games it is attached to."""
+
+    @abc.abstractmethod
+    def emit(self, turn: int, kind: EventKind, seat: int, a: int, b: int):
+        """Record one event of the current game."""
+
+    def close(self):
+        pass
+
+
+class EventLog(EventSink):
+    """
+    Append events to a binary file in blocks of ``block_size`` records.
+
+    Game numbers carry on from the last game already in the file, which must
+    be a log of the same version.
+    """
+
+    def __init__(self, path: tp.Union[str, os.PathLike], block_size: int = 1 << 16):
+        self.path = path
+        self.file = open(path, 'a+b')
+        size = self.file.seek(0, os.SEEK_END)
+        self.game = 0
+        if size == 0:
+            self.file.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+        else:
+            self.file.seek(0)
+            header = self.file.read(HEADER.size)
+            if (len(header) != HEADER.size or HEADER.unpack(header) != (MAGIC, VERSION, RECORD.size)
+                    or (size - HEADER.size) % RECORD.size):
+                self.file.close()
+                raise ValueError(f'{path} is not a version {VERSION} event log.')
+            if size > HEADER.size:
+                self.file.seek(-RECORD.size, os.SEEK_END)
+                self.game = RECORD.unpack(self.file.read(RECORD.size))[0] + 1
+        self.buffer = bytearray(block_size * RECORD.size)
+        self.used = 0
+
+    def emit(self, turn: int, kind: EventKind, seat: int, a: int, b: int):
+        RECORD.pack_into(self.buffer, self.used, self.game, turn, kind, seat, a, b)
+        self.used += RECORD.size
+        if kind == EventKind.GAME_END:
+            self.game += 1
+        if self.used == len(self.buffer):
+            self.flush()
+
+    def flush(self):
+        if self.used:
+            self.file.write(memoryview(self.buffer)[:self.used])
+            self.used = 0
+        self.file.flush()
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_blocks(path: tp.Union[str, os.PathLike], block_size: int = 1 << 16) -> tp.Iterator[bytes]:
+    """Yield the raw records of a log in chunks of at most block_size records."""
+    with open(path, 'rb') as f:
+        magic, version, size = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or version != VERSION or size != RECORD.size:
+            raise ValueError(f'{path} is not a version {VERSION} event log.')
+        while True:
+            block = f.read(block_size * RECORD.size)
+            if not block:
+                return
+            yield block
+
+
+def read_events(path: tp.Union[str, os.PathLike]) -> tp.Iterator[Event]:
+    for block in read_blocks(path):
+        yield from map(Event._make, RECORD.iter_unpack(block))
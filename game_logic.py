@@ -4,10 +4,13 @@ import operator as oper
 import random
 import typing as tp
 
-from gofish.card import Deck
+from gofish.card import CARDS, Card, Deck
+from gofish.events import NONE, EventKind, EventSink
 from gofish.interaction import MessageQueue, GamePrompts, GameStrings
 from gofish.player import HumanPlayer, AiPlayer, AnyPlayer
-from gofish.turn import Turn, AiTurn, clear_screen
+from gofish.rules import DEFAULT_RULES, EndCondition, Rules
+from gofish.snapshot import GameSnapshot
+from gofish.turn import Turn, TurnOutcomes, ai_strategy, clear_screen, user_strategy
 
 prompts_ = GamePrompts()
 
@@ -21,16 +24,18 @@ def create_ai_player(num_ai: int = 1) -> tp.Tuple[AiPlayer, ...]:
     return tuple(map(AiPlayer, range(1, num_ai + 1)))  # return tuple(repeatfunc(AiPlayer, num_ai))
 
 
-def new_deck(d: tp.Optional[Deck] = None) -> Deck:
+def new_deck(d: tp.Optional[Deck] = None, rng: tp.Optional[random.Random] = None,
+             rules: Rules = DEFAULT_RULES) -> Deck:
     if not d:
-        d = Deck()
+        d = Deck(rng, rules)
     d.reset()
     return d
 
 
-def randomize_turns(players: tp.Sequence[AnyPlayer]) -> tp.Deque[AnyPlayer]:
+def randomize_turns(players: tp.Sequence[AnyPlayer],
+                    rng: tp.Optional[random.Random] = None) -> tp.Deque[AnyPlayer]:
     _players = list(players)
-    random.shuffle(_players)
+    (rng or random).shuffle(_players)
     return coll.deque(_players)
 
 
@@ -55,33 +60,104 @@ class GoFish:
     strings = GameStrings()
     prompts = GamePrompts()
     messages = MessageQueue()
-    winloss = {'win': 0, 'loss': 0}
-    games_played = 0
+    turn_class = Turn
 
-    def __init__(self):
-        print(self.strings.WELCOME)
-        self.deck = new_deck()
-        self.user = create_human_player()
-        self.players: tp.Sequence[AnyPlayer] = build_players(self.user)
-        self.turn_order = randomize_turns(self.players)
+    def __init__(self, players: tp.Sequence[AnyPlayer], rng: tp.Optional[random.Random] = None,
+                 rules: Rules = DEFAULT_RULES):
+        """
+        :param players: every seat at the table, the first human one is the user.
+        :param rng: source of every random choice in the game, seed it to reproduce games.
+        :param rules: table rules shared with the deck.
+        """
+        rules.check_players(len(players))
+        self.rng = rng or random.Random()
+        self.rules = rules
+        self.winloss = {'win': 0, 'loss': 0}
+        self.games_played = 0
+        self.deck = new_deck(rng=self.rng, rules=rules)
+        self.user = next((p for p in players if p.is_human), None)
+        self.players: tp.Sequence[AnyPlayer] = tuple(players)
+        self.turn_order = randomize_turns(self.players, self.rng)
+        self.turns = 0
+        # Set once any hand runs out, so game_over never scans the table
+        self.hand_out = False
+        self.trackers = []
+        self.seat_index: tp.Dict[AnyPlayer, int] = {}
+        self.events: tp.List[EventSink] = []
+        # instrument.TurnHooks wrapped around every turn, None for no hooks
+        self.hooks = None
+        self.turn = self.turn_class(self)
+
+    @classmethod
+    def setup(cls, rng: tp.Optional[random.Random] = None, rules: Rules = DEFAULT_RULES):
+        """Welcome the user and prompt for their name and the number of AI opponents."""
+        print(cls.strings.WELCOME)
+        return cls(build_players(), rng, rules)
 
     def new_game(self, first=False):
         """Start a new game by (re)initializing required variables."""
 
         if not first:
+            self.messages.wait()
             clear_screen()
             self.user.hand.clear_hand()
-            self.deck = new_deck()
+            self.deck = new_deck(self.deck)
             self.players = build_players(self.user)
-            self.turn_order = randomize_turns(self.players)
+            self.turn_order = randomize_turns(self.players, self.rng)
+        self.turns = 0
         self.deck.deal_hands(*map(oper.attrgetter('hand'), self.players))
+        self.seat_index = {p: seat for seat, p in enumerate(self.players)}
+        self.trackers = [p.beliefs for p in self.players if not p.is_human]
+        for tracker in self.trackers:
+            tracker.reset(self.players, self.rules.copies)
         for p in self.players:
-            p.collect_pairs()
+            self.announce_pairs(p, p.collect_pairs(self.rules.set_size))
+        self.hand_out = not all(p.hand for p in self.players)
+
+    def emit(self, kind: EventKind, player: AnyPlayer, a: int = NONE, b: int = NONE):
+        """Send an event to every sink in ``events``."""
+        seat = self.seat_index[player]
+        for sink in self.events:
+            sink.emit(self.turns, kind, seat, a, b)
+
+    def announce_ask(self, asker: AnyPlayer, opp: AnyPlayer, rank: int, given: tp.Optional[Card]):
+        """Tell every AI that asker asked opp for rank and whether opp gave a card."""
+        for tracker in self.trackers:
+            tracker.on_ask(asker, opp, rank, given is not None)
+        if self.events:
+            self.emit(EventKind.ASK, asker, self.seat_index[opp], rank)
+            self.emit(EventKind.RESPONSE, opp, NONE if given is None else given.index,
+                      self.seat_index[asker])
+
+    def announce_draw(self, player: AnyPlayer, card: Card, outcome: TurnOutcomes):
+        """Tell every AI that player drew a card, only showing it on a fish match."""
+        for tracker in self.trackers:
+            tracker.on_draw(player, card, outcome is TurnOutcomes.FISH_MATCH)
+        if self.events:
+            self.emit(EventKind.DRAW, player, card.index, outcome.value)
+
+    def announce_pairs(self, player: AnyPlayer, pairs: tp.Sequence[tp.Tuple[Card, Card]]):
+        for tracker in self.trackers:
+            for pair in pairs:
+                tracker.on_pair(player, pair[0].rank, len(pair))
+        if self.events:
+            for pair in pairs:
+                self.emit(EventKind.PAIR, player, pair[0].index, pair[1].index)
+
+    def announce_end(self, ranked: tp.Sequence[AnyPlayer]):
+        if self.events:
+            self.emit(EventKind.GAME_END, ranked[0], ranked[0].num_pairs, len(ranked))
+
+    def check_hands(self, *players: tp.Optional[AnyPlayer]):
+        """Note an empty hand among players, the only ones whose hands shrank this turn."""
+        for p in players:
+            if p is not None and not p.hand:
+                self.hand_out = True
 
     def game_over(self):
-        """Game is over when the deck or any player's hand reaches 0."""
+        """Game is over when the deck reaches 0 or, under FIRST_OUT rules, any hand does."""
 
-        finished = (len(self.deck) == 0) or any(p.hand.count == 0 for p in self.players)
+        finished = not self.deck or self.hand_out and self.rules.end is EndCondition.FIRST_OUT
         if finished:
             self.messages.add_message(self.strings.GAME_OVER)
         return finished
@@ -90,6 +166,7 @@ class GoFish:
         """Sort players by num_pairs and check if the user got 1st place."""
 
         ranked = sorted(self.players, key=lambda x: x.num_pairs, reverse=True)
+        self.announce_end(ranked)
         wl = 'win' if ranked[0] is self.user else 'loss'
         self.winloss[wl] += 1
         return ranked
@@ -111,26 +188,87 @@ class GoFish:
         self.messages.add_message(self.strings.PLAYED_WON_LOSS, self, self.winloss, offset=8,
                                   urgent=True)
         self.messages.execute()
+        self.messages.wait()
 
-    def next_turn(self, turn: tp.Optional[tp.Union[Turn, AiTurn]] = None) -> tp.Union[Turn, AiTurn]:
+    def next_turn(self, turn: tp.Optional[Turn] = None) -> Turn:
         """
         Rotate player order depending on the active player's outcome.
 
         :param turn: The current Turn being used in the game.
-        :return: A new Turn depending on the active player's type
+        :return: The game's Turn, started for the next player with their strategy
         """
-        if not turn:
-            return Turn(self) if self.turn_order[0].is_human else AiTurn(self)
-        rotation = turn.outcome.extra_turns()
-        self.turn_order.appendleft(turn.active)
-        self.turn_order.rotate(rotation)
-        return Turn(self) if self.turn_order[0].is_human else AiTurn(self)
+        if turn:
+            rotation = turn.outcome.extra_turns()
+            self.turn_order.appendleft(turn.active)
+            self.turn_order.rotate(rotation)
+            if self.events:
+                self.emit(EventKind.TURN, self.turn_order[0], self.seat_index[turn.active],
+                          turn.outcome.value)
+        elif self.events:
+            self.emit(EventKind.TURN, self.turn_order[0])
+        active = self.turn_order[0]
+        return self.turn.start(user_strategy if active.is_human else active.strategy or ai_strategy)
+
+    def advance(self, turn: Turn) -> Turn:
+        """Count the finished turn and start the next one, see ``next_turn``."""
+        turn = self.next_turn(turn)
+        self.turns += 1
+        return turn
+
+    def snapshot(self) -> GameSnapshot:
+        """
+        Capture the game as of the start of the current or next turn.
+
+        Taken while a turn is being chosen, e.g. from a strategy, the snapshot
+        replays that turn; taken after a turn ended it starts at the next one.
+        """
+        order = coll.deque(self.turn_order)
+        turn = self.turn
+        if turn.active is not None:
+            order.appendleft(turn.active)
+            if turn.outcome is not TurnOutcomes.IN_PROGRESS:
+                order.rotate(turn.outcome.extra_turns())
+        seat = self.seat_index
+        return GameSnapshot(
+            self.turns, bytes(seat[p] for p in order), bytes(c.index for c in self.deck.stack),
+            tuple(bytes(c.index for c in p.hand) for p in self.players),
+            tuple(bytes(c.index for pair in p.pairs for c in pair) for p in self.players),
+            tuple(() if p.is_human else p.beliefs.snapshot(self.players) for p in self.players),
+            self.rng.getstate())
+
+    def restore(self, snap: GameSnapshot):
+        """Load a ``snapshot`` of a game seated with the same players, ``resume`` plays it on."""
+        players = self.players
+        self.turns = snap.turns
+        self.deck.stack = coll.deque(map(CARDS.__getitem__, snap.deck))
+        for p, hand, pairs, tracker in zip(players, snap.hands, snap.pairs, snap.trackers):
+            p.hand.clear_hand()
+            p.hand.add_to_hand(*map(CARDS.__getitem__, hand))
+            p.pairs[:] = zip(*[iter(map(CARDS.__getitem__, pairs))] * self.rules.set_size)
+            if tracker:
+                p.beliefs.restore(tracker, players)
+        self.hand_out = not all(p.hand for p in players)
+        self.turn_order = coll.deque(map(players.__getitem__, snap.order))
+        self.seat_index = {p: seat for seat, p in enumerate(players)}
+        self.trackers = [p.beliefs for p in players if not p.is_human]
+        self.turn.active = None
+        self.rng.setstate(snap.rng)
 
     def play(self):
+        if self.hooks is not None:
+            self.hooks.start_game(self)
         self.new_game(False if self.games_played else True)
+        return self.resume()
+
+    def resume(self):
+        """Play the current game out from the start of a turn and score it."""
         turn = self.next_turn()
         while not self.game_over():
             turn.execute()
-            turn = self.next_turn(turn)
+            turn = self.advance(turn)
+        if self.hooks is not None:
+            self.hooks.end_game(self)
         self.games_played += 1
-        self.print_scores(self.score_game())
+        ranked = self.score_game()
+        self.print_scores(ranked)
+        return ranked
@@ -0,0 +1,195 @@
+"""
+Hooks around the phases of ``Turn.execute`` and timing histograms built on them.
+
+Set a ``TurnHooks`` instance as ``GoFish.hooks`` to get ``before``/``after``
+callbacks for the ``enter``, ``do_ask``, ``do_go_fish``, ``exit`` and
+``collect_pairs`` phases of every turn, plus ``start_game``/``end_game``.
+While ``hooks`` is ``None`` a turn pays for one attribute check.
+
+``Instrumentation`` records each phase into a ``Histogram``, counts turn
+outcomes, can time only every n-th turn, and runs every n-th game under
+cProfile. ``report`` renders it all as text.
+"""
+import cProfile
+import collections as coll
+import functools
+import io
+import pstats
+import time
+import typing as tp
+
+from gofish.turn import TurnOutcomes
+
+if tp.TYPE_CHECKING:
+    from gofish.game_logic import GoFish
+    from gofish.turn import Turn
+
+PHASES = ('enter', 'do_ask', 'do_go_fish', 'exit', 'collect_pairs')
+
+
+class TurnHooks:
+    """No-op hooks, subclass and override the callbacks you need."""
+
+    def before(self, phase: str, turn: 'Turn'):
+        pass
+
+    def after(self, phase: str, turn: 'Turn'):
+        pass
+
+    def start_game(self, game: 'GoFish'):
+        pass
+
+    def end_game(self, game: 'GoFish'):
+        pass
+
+    def phase(self, name: str, turn: 'Turn', step: tp.Callable[[], tp.Any]):
+        """Run one phase of turn between its callbacks."""
+        self.before(name, turn)
+        step()
+        self.after(name, turn)
+
+    def run_turn(self, turn: 'Turn'):
+        """``Turn.execute`` with every phase passed through ``phase``."""
+        # collect_pairs runs inside exit, shadow it for this turn only
+        turn.collect_pairs = functools.partial(self.phase, 'collect_pairs', turn,
+                                               turn.collect_pairs)
+        try:
+            self.phase('enter', turn, turn.enter)
+            self.phase('do_ask', turn, turn.do_ask)
+            if turn.outcome is TurnOutcomes.IN_PROGRESS:
+                self.phase('do_go_fish', turn, turn.do_go_fish)
+            self.phase('exit', turn, turn.exit)
+        finally:
+            del turn.collect_pairs
+
+
+class Histogram:
+    """
+    Log-linear histogram of nanosecond durations, 8 buckets per power of two.
+
+    Recording is a couple of integer operations and a list increment, and
+    percentiles are within 12.5% of the true value.
+    """
+
+    SUB_BITS = 3
+
+    __slots__ = ('counts', 'count', 'total', 'min', 'max')
+
+    def __init__(self):
+        self.counts = [0] * (64 << self.SUB_BITS)
+        self.count = 0
+        self.total = 0
+        self.min = 0
+        self.max = 0
+
+    def record(self, ns: int):
+        shift = ns.bit_length() - self.SUB_BITS - 1
+        if shift > 0:
+            self.counts[((shift + 1) << self.SUB_BITS) + (ns >> shift) - (1 << self.SUB_BITS)] += 1
+        else:
+            self.counts[ns] += 1
+        if not self.count or ns < self.min:
+            self.min = ns
+        if ns > self.max:
+            self.max = ns
+        self.count += 1
+        self.total += ns
+
+    def _bucket_high(self, bucket: int) -> int:
+        group, sub = divmod(bucket, 1 << self.SUB_BITS)
+        if group < 2:
+            return bucket
+        shift = group - 1
+        return ((sub + (1 << self.SUB_BITS) + 1) << shift) - 1
+
+    def percentile(self, q: float) -> int:
+        """Upper bound of the bucket holding the q-th percentile, clipped to max."""
+        if not self.count:
+            return 0
+        target = q / 100 * self.count
+        seen = 0
+        for bucket, n in enumerate(self.counts):
+            seen += n
+            if n and seen >= target:
+                return min(self._bucket_high(bucket), self.max)
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def merge(self, other: 'Histogram'):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        if other.count and (not self.count or other.min < self.min):
+            self.min = other.min
+        self.max = max(self.max, other.max)
+        self.count += other.count
+        self.total += other.total
+
+
+class Instrumentation(TurnHooks):
+    """
+    Phase timings, outcome counters and optional cProfile runs.
+
+    :param sample_every: time one turn in this many, the others run untimed.
+    :param profile_every: run one game in this many under cProfile, 0 to never profile.
+    """
+
+    def __init__(self, sample_every: int = 1, profile_every: int = 0):
+        self.sample_every = sample_every
+        self.profile_every = profile_every
+        self.timings: tp.Dict[str, Histogram] = {name: Histogram() for name in (*PHASES, 'turn')}
+        self.counters: tp.Counter[str] = coll.Counter()
+        self.profile: tp.Optional[pstats.Stats] = None
+        self._profiler: tp.Optional[cProfile.Profile] = None
+        self._clock = time.perf_counter_ns
+
+    def phase(self, name: str, turn: 'Turn', step: tp.Callable[[], tp.Any]):
+        start = self._clock()
+        step()
+        self.timings[name].record(self._clock() - start)
+
+    def run_turn(self, turn: 'Turn'):
+        self.counters['turns'] += 1
+        if self.counters['turns'] % self.sample_every:
+            turn.enter().resolve()
+        else:
+            start = self._clock()
+            super().run_turn(turn)
+            self.timings['turn'].record(self._clock() - start)
+        self.counters[turn.outcome.name] += 1
+
+    def start_game(self, game: 'GoFish'):
+        self.counters['games'] += 1
+        if self.profile_every and self.counters['games'] % self.profile_every == 0:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    def end_game(self, game: 'GoFish'):
+        if self._profiler is not None:
+            self._profiler.disable()
+            self.counters['profiled_games'] += 1
+            if self.profile is None:
+                self.profile = pstats.Stats(self._profiler)
+            else:
+                self.profile.add(self._profiler)
+            self._profiler = None
+
+    def report(self, top: int = 15) -> str:
+        out = io.StringIO()
+        print(f'Games: {self.counters["games"]}\tTurns: {self.counters["turns"]}', file=out)
+        print(f'{"phase":<14}{"count":>9}{"mean us":>10}{"p50 us":>9}{"p90 us":>9}{"p99 us":>9}'
+              f'{"max us":>9}', file=out)
+        for name, h in self.timings.items():
+            if h.count:
+                print(f'{name:<14}{h.count:>9}{h.mean / 1e3:>10.2f}{h.percentile(50) / 1e3:>9.2f}'
+                      f'{h.percentile(90) / 1e3:>9.2f}{h.percentile(99) / 1e3:>9.2f}'
+                      f'{h.max / 1e3:>9.2f}', file=out)
+        outcomes = [(o.name, self.counters[o.name]) for o in TurnOutcomes if self.counters[o.name]]
+        if outcomes:
+            print('Outcomes: ' + '  '.join(f'{name} {n}' for name, n in outcomes), file=out)
+        if self.profile is not None:
+            print(f'\ncProfile of {self.counters["profiled_games"]} games:', file=out)
+            self.profile.stream = out
+            self.profile.sort_stats('cumulative').print_stats(top)
+        return out.getvalue()
@@ -1,12 +1,22 @@
-from collections import deque
-from itertools import starmap
+import json
+from abc import ABC, abstractmethod
+from collections import deque, namedtuple
+from functools import lru_cache
+from itertools import count
+from operator import attrgetter, itemgetter
+from queue import Queue
 from string import Formatter, ascii_letters, digits
+from threading import Thread
 from time import sleep
-from typing import Optional, Sequence, Any, Union, Tuple
+from types import MappingProxyType
+from typing import (Optional, Sequence, Any, Union, Tuple, List, TextIO, Iterator, Callable,
+                    Mapping, TYPE_CHECKING)
 
-from gofish.card import Card, GOFISH_MAX_PLAYERS
+from gofish.card import Card, GOFISH_MAX_AI
 from gofish.player import HumanPlayer, AiPlayer
-from gofish.turn import Turn
+
+if TYPE_CHECKING:
+    from gofish.turn import Turn
 
 
 class _GameStrings:
@@ -29,11 +39,11 @@ class _GameStrings:
     PLAYED_WON_LOSS = 'Played:\t{0.games_played:<{offset}}\n' \
                       'Wins:\t{1[win]:<{offset}}\nLosses:\t{1[loss]:<{offset}}'
     GET_NUM_AI = f'Enter the number of AI players to play against. ' \
-                 f'(1-{GOFISH_MAX_PLAYERS})\nGOF >>> '
+                 f'(1-{GOFISH_MAX_AI})\nGOF >>> '
     GET_NAME = 'Please enter your name\nGOF >>> '
     GET_CARD_CHOICE = 'Enter the number below the card you want to match.\nGOF >>> '
     GET_OPP_CHOICE = 'Enter the number next to the player you want to ask.\nGOF >>> '
-    WRONG_NUM_AI = f'Enter only numbers between 1-{GOFISH_MAX_PLAYERS}, inclusive.'
+    WRONG_NUM_AI = f'Enter only numbers between 1-{GOFISH_MAX_AI}, inclusive.'
     WRONG_INDEX = 'Enter only the numbers shown.'
     WRONG_TYPE_NUM = 'Enter a number only.'
     WRONG_STRING = 'Alphanumeric characters only, please.'
@@ -42,71 +52,297 @@ class _GameStrings:
     STOP_CHEATING = 'Stop trying to cheat!'
 
 
+class _FieldPath:
+    """Stand-in value that records the attribute and item lookups made on it."""
+
+    __slots__ = ('steps',)
+
+    def __init__(self):
+        object.__setattr__(self, 'steps', [])
+
+    def __getattribute__(self, name: str) -> '_FieldPath':
+        object.__getattribute__(self, 'steps').append((True, name))
+        return self
+
+    def __getitem__(self, key) -> '_FieldPath':
+        object.__getattribute__(self, 'steps').append((False, key))
+        return self
+
+
+class _FieldSplitter(Formatter):
+    """Formatter whose ``get_field`` resolves every field against a _FieldPath."""
+
+    def get_value(self, key, args, kwargs):
+        return _FieldPath()
+
+
+def _split_field(field: str) -> Tuple[Union[int, str], List[Tuple[bool, Union[int, str]]]]:
+    """Split a format field like ``1[win]`` into its key and lookups, as str.format does."""
+    path, first = _FieldSplitter().get_field(field, (), {})
+    return first, object.__getattribute__(path, 'steps')
+
+
+def _field_getter(field: str, auto_index: Iterator[int]) -> Callable[[tuple, dict], Any]:
+    """Build a getter resolving a format field like ``0.games_played`` or ``1[win]``."""
+    first, rest = _split_field(field)
+    if first == '':
+        first = next(auto_index)
+    steps = [attrgetter(key) if is_attr else itemgetter(key) for is_attr, key in rest]
+
+    def getter(args, kwargs):
+        obj = args[first] if isinstance(first, int) else kwargs[first]
+        for step in steps:
+            obj = step(obj)
+        return obj
+
+    return getter
+
+
+def _shared_attr_paths(fields: Sequence[str]) -> Optional[Tuple[str, List[str]]]:
+    """If every field is an attribute path off one keyword, like ``turn.active``, return both."""
+    names = set()
+    paths = []
+    for field in fields:
+        first, rest = _split_field(field)
+        if not isinstance(first, str) or not first or not rest or not all(a for a, _ in rest):
+            return None
+        names.add(first)
+        paths.append('.'.join(key for _, key in rest))
+    return (names.pop(), paths) if len(names) == 1 else None
+
+
+def _escape(literal: str) -> str:
+    return literal.replace('{', '{{').replace('}', '}}')
+
+
+def _positional(template: str, fields: List[str]) -> str:
+    """Replace every field of template with a positional one, appending its name to fields."""
+    out = []
+    for literal, field, spec, conv in Formatter().parse(template):
+        out.append(_escape(literal))
+        if field is None:
+            continue
+        fields.append(field)
+        out.append(f'{{{len(fields) - 1}')
+        if conv:
+            out.append(f'!{conv}')
+        if spec:
+            out.append(f':{_positional(spec, fields)}')
+        out.append('}')
+    return ''.join(out)
+
+
+class CompiledString:
+    """
+    A format string parsed once into precompiled field getters and a positional template.
+
+    Rendering resolves the getters and hands the values straight to ``str.format``,
+    so nothing is re-parsed. Templates whose fields all hang off one keyword, like
+    the ``turn`` strings, fetch every field with a single ``attrgetter`` call.
+    Instances are immutable and safe to share between threads.
+    """
+
+    __slots__ = ('template', '_format', '_getters', '_owner', '_owner_fields')
+
+    def __init__(self, template: str):
+        self.template = template
+        fields = []
+        self._format = _positional(template, fields).format
+        auto_index = count()
+        self._getters = tuple(_field_getter(f, auto_index) for f in fields)
+        shared = _shared_attr_paths(fields)
+        self._owner = shared[0] if shared else None
+        self._owner_fields = attrgetter(*shared[1]) if shared else None
+
+    def __repr__(self):
+        return f'<CompiledString: {self.template!r}>'
+
+    def render(self, *args, **kwargs) -> str:
+        if self._owner is not None and self._owner in kwargs:
+            values = self._owner_fields(kwargs[self._owner])
+            return self._format(*values) if len(self._getters) > 1 else self._format(values)
+        return self._format(*[get(args, kwargs) for get in self._getters])
+
+
+@lru_cache(maxsize=None)
+def compile_string(template: str) -> CompiledString:
+    """Compile a format string, reusing the result for every later call."""
+    return CompiledString(template)
+
+
+# Every _GameStrings constant compiled once, by attribute name
+COMPILED_STRINGS: Mapping[str, CompiledString] = MappingProxyType({
+    key: compile_string(value) for key, value in vars(_GameStrings).items() if key.isupper()})
+
+
+def render(key: str, *args, **kwargs) -> str:
+    """Render the _GameStrings constant named key."""
+    return COMPILED_STRINGS[key].render(*args, **kwargs)
+
+
 class GameStrings(Formatter, _GameStrings):
     def __init__(self, format_string: Optional[str] = None):
         super().__init__()
         self._format_string = format_string
-        self._parsed_string = self.parse(self._format_string) if format_string else None
 
     def parse(self, format_string):
         return super().parse(format_string)
 
     def format_game_string(self, game_str: Optional[str] = None, *args, **kwargs):
-        if not (self._format_string or game_str):
+        """Format game_str, or the instance's string, through the compiled string cache."""
+        template = game_str or self._format_string
+        if not template:
             raise ValueError('No string available to format.')
-        if game_str:
-            self._format_string = game_str
-            self._parsed_string = self.parse(self._format_string)
-        for littext, fldname, spec, conv in self._parsed_string:
-            if fldname == 'turn':
-                try:
-                    val = self.get_value(fldname, args, kwargs)
-                except (IndexError, KeyError):
-                    print('No Turn found in kwargs despite "turn" being a field.')
-                    raise
-                return self._format_string.format(turn=val, *args, **kwargs)
-        ret_str = self.format()
-        return ret_str
+        return compile_string(template).render(*args, **kwargs)
 
     def new_format_string(self, nfs):
         if isinstance(nfs, str):
             self._format_string = nfs
-            self._parsed_string = self.parse(self._format_string)
 
 
 # game_strings = GameStrings()
 
 
+class Message(namedtuple('Message', 'template args kwargs urgent')):
+    """A queued game string, only formatted when a sink asks for its text."""
+    __slots__ = ()
+
+    @property
+    def text(self) -> str:
+        return compile_string(self.template).render(*self.args, **self.kwargs)
+
+
+class MessageSink(ABC):
+    """Destination for executed messages."""
+    consumes = True
+
+    @abstractmethod
+    def write(self, message: Message):
+        """Output one executed message."""
+
+    def drain(self):
+        """Block until everything written so far has been output."""
+
+    def close(self):
+        self.drain()
+
+
+class NullSink(MessageSink):
+    """Discards messages without formatting them, for headless games."""
+    consumes = False
+
+    def write(self, message: Message):
+        pass
+
+
+class TerminalSink(MessageSink):
+    """
+    Print messages, pausing ``pace`` seconds after each non-urgent one.
+
+    The pauses happen on a background thread so game logic never waits on them;
+    call ``drain`` before anything that needs the screen to be caught up.
+    """
+
+    def __init__(self, pace: float = 3.0, stream: Optional[TextIO] = None):
+        self.pace = pace
+        self.stream = stream
+        self._pending: 'Queue[Tuple[str, bool]]' = Queue()
+        self._printer: Optional[Thread] = None
+
+    def write(self, message: Message):
+        text = message.text
+        if not self.pace:
+            print(text, file=self.stream)
+            return
+        if self._printer is None:
+            self._printer = Thread(target=self._print_paced, name='gofish-terminal', daemon=True)
+            self._printer.start()
+        self._pending.put((text, message.urgent))
+
+    def _print_paced(self):
+        while True:
+            text, urgent = self._pending.get()
+            print(text, file=self.stream, flush=True)
+            if not urgent:
+                sleep(self.pace)
+            self._pending.task_done()
+
+    def drain(self):
+        if self._printer is not None:
+            self._pending.join()
+
+
+class JsonlSink(MessageSink):
+    """Append messages as JSON lines, writing to disk every ``buffer_size`` messages."""
+
+    def __init__(self, path: str, buffer_size: int = 1024):
+        self.path = path
+        self.buffer_size = buffer_size
+        self._buffer: List[str] = []
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, message: Message):
+        self._buffer.append(json.dumps({'urgent': message.urgent, 'text': message.text}))
+        if len(self._buffer) >= self.buffer_size:
+            self.drain()
+
+    def drain(self):
+        if self._buffer:
+            self._file.write('\n'.join(self._buffer) + '\n')
+            self._buffer.clear()
+        self._file.flush()
+
+    def close(self):
+        self.drain()
+        self._file.close()
+
+
 class MessageQueue:
-    def __init__(self):
+    def __init__(self, sinks: Optional[Sequence[MessageSink]] = None):
         self.messages = deque()
+        self.sinks = list(sinks) if sinks is not None else [TerminalSink()]
+        # Skip queueing entirely when no sink would read the messages
+        self._live = any(s.consumes for s in self.sinks)
 
     def add_message(self, msg: Union[str, GameStrings], *args, urgent=False, **kwargs):
-        _msg = msg.format(*args, **kwargs)
-        self.messages.append((urgent, _msg))
+        if self._live:
+            self.messages.append(Message(msg, args, kwargs, urgent))
 
     def extend_queue(self, *args: Tuple[Any]):
-        if args:
-            starmap(self.add_message, args)
+        for message_args in args:
+            self.add_message(*message_args)
 
     def execute(self):
         while self.messages:
-            urgent, message = self.messages.popleft()
-            print(message)
-            if not urgent:
-                sleep(3)
+            message = self.messages.popleft()
+            for sink in self.sinks:
+                sink.write(message)
+
+    def wait(self):
+        """Wait for every sink to output what it has been given."""
+        for sink in self.sinks:
+            sink.drain()
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
 
 
 class GamePrompts:
     def __init__(self):
         self.game_strings = GameStrings()
 
-    def have_card(self, turn: Turn, matched: bool):
+    def have_card(self, turn: 'Turn', matched: bool):
         if turn.opponent.is_human:
             lying = True
             while lying:
-                answer = input(self.game_strings.
-                               format_game_string(self.game_strings.HAVE_CARD, turn))
+                answer = input(render('HAVE_CARD', turn=turn))
                 lying = (answer == 'y' and not matched) or (answer == 'n' and matched)
                 if not lying:
                     break
@@ -117,7 +353,7 @@ class GamePrompts:
         while True:
             answer = input(self.game_strings.GET_NUM_AI)
             if answer in digits:
-                if 1 <= int(answer) <= GOFISH_MAX_PLAYERS:
+                if 1 <= int(answer) <= GOFISH_MAX_AI:
                     return int(answer)
                 print(self.game_strings.WRONG_NUM_AI)
                 continue
@@ -0,0 +1,335 @@
+"""
+Information-set Monte Carlo tree search player.
+
+Each iteration deals the cards the player cannot see into a random
+determinization consistent with what it has observed, walks its search tree
+with UCB using availability counts, and finishes the game with a
+``bitboard.BitGame`` rollout. Opponents, and the player once it leaves the
+tree, ask like the built-in AI from what the table has seen, and the tree
+only branches on the likeliest opponent for each rank. The tree is open loop
+over the player's own decisions, so after a move the chosen child becomes
+the next root and its statistics carry over between turns.
+"""
+import collections as coll
+import math
+import random
+import time
+import typing as tp
+
+from gofish.bitboard import (BitGame, FULL_MASK, INDEX_RANK, NUM_CARDS, RANK_MASKS, hand_mask,
+                             held_ranks, mask_indexes, memory_strategy)
+from gofish.recipes import flatten
+from gofish.turn import Strategy, TurnOutcomes, chosen_opp
+
+Action = tp.Tuple[int, int]
+
+Observation = coll.namedtuple('Observation',
+                              'seat hand laid hand_sizes deck_size pairs order known excluded')
+Observation.__doc__ = """\
+What one seat knows at its decision point, all in bitboard terms.
+
+``hand`` is the seat's own hand mask, ``laid`` every card laid down in pairs,
+``order`` the seats in turn order starting with the decider, ``known[s]``
+the rank bits seat ``s`` is known to hold and ``excluded[s]`` those it
+denied holding since its last unseen draw."""
+
+
+def observe_turn(turn) -> Observation:
+    """Build the active AiPlayer's Observation from an object-engine Turn."""
+    game = turn.game
+    players = list(game.players)
+    seat = players.index(turn.active)
+    tracker = turn.active.beliefs
+    known = [tracker.known_ranks(p) for p in players]
+    known[seat] = 0
+    excluded = [tracker.excluded.get(p, 0) for p in players]
+    excluded[seat] = 0
+    return Observation(
+        seat=seat,
+        hand=hand_mask(turn.active.hand),
+        laid=hand_mask(flatten(flatten(p.pairs for p in players))),
+        hand_sizes=tuple(len(p.hand) for p in players),
+        deck_size=len(game.deck),
+        pairs=tuple(p.num_pairs for p in players),
+        order=(seat, *(players.index(p) for p in game.turn_order)),
+        known=tuple(known),
+        excluded=tuple(excluded))
+
+
+def observe_bits(game: BitGame, seat: int) -> Observation:
+    """Build seat's Observation from a BitGame without peeking at hidden cards."""
+    n = game.num_players
+    order = tuple(game.order[(game.pos + k) % n] for k in range(n))
+    return Observation(seat, game.hands[seat], game.laid, tuple(map(_popcount, game.hands)),
+                       len(game.deck), tuple(game.pairs), order, tuple(game.memory[seat]),
+                       (0,) * n)
+
+
+def _popcount(mask: int) -> int:
+    return bin(mask).count('1')
+
+
+def _still_held(ranks: int, hand: int) -> int:
+    """The rank bits of ranks that hand holds a card of."""
+    wanted = ranks
+    while wanted:
+        bit = wanted & -wanted
+        if not hand & RANK_MASKS[bit.bit_length() - 1]:
+            ranks ^= bit
+        wanted ^= bit
+    return ranks
+
+
+class Node:
+    __slots__ = ('children', 'visits', 'wins', 'avail')
+
+    def __init__(self):
+        self.children: tp.Dict[Action, 'Node'] = {}
+        self.visits = 0
+        self.wins = 0.0
+        self.avail = 1
+
+
+class IsmctsPlayer:
+    """
+    Search-based AI usable as an AiPlayer strategy (``strategy``) or a BitGame strategy.
+
+    :param iterations: iterations per move, ``None`` to rely on the time budget.
+    :param time_budget: seconds per move, ``None`` to rely on the iteration count.
+    :param exploration: UCB exploration constant.
+    """
+
+    def __init__(self, iterations: tp.Optional[int] = None, time_budget: tp.Optional[float] = 0.05,
+                 exploration: float = 0.25, rng: tp.Optional[random.Random] = None):
+        if iterations is None and time_budget is None:
+            raise ValueError('Either iterations or time_budget must be given.')
+        self.iterations = iterations
+        self.time_budget = time_budget
+        self.exploration = exploration
+        self.rng = rng or random.Random()
+        self.total_iterations = 0
+        self.total_time = 0.0
+        self.last_iterations = 0
+        self._sim: tp.Optional[BitGame] = None
+        self._root: tp.Optional[Node] = None
+        self._game_key = None
+
+    @property
+    def iterations_per_second(self) -> float:
+        return self.total_iterations / self.total_time if self.total_time else 0.0
+
+    @property
+    def strategy(self) -> Strategy:
+        return Strategy(self.choose_card, chosen_opp)
+
+    def choose_card(self, turn):
+        game = turn.game
+        endgame = turn.active.endgame
+        if (endgame is not None and len(game.deck) <= endgame.threshold
+                and endgame.supports(game.rules, len(game.players))):
+            # The last cards are searched exactly, as the built-in AI does
+            rank, opp = endgame.choose(turn)
+            self.reset()
+        else:
+            rank, seat = self.decide(observe_turn(turn), (id(game), game.games_played))
+            opp = game.players[seat]
+        turn.wanted_card = turn.active.hand.rank_card(rank)
+        turn.opponent = opp
+        return turn
+
+    def __call__(self, game: BitGame, seat: int) -> Action:
+        return self.decide(observe_bits(game, seat), (id(game), game.deals))
+
+    def reset(self):
+        """Drop the search tree."""
+        self._root = None
+        self._game_key = None
+
+    def decide(self, obs: Observation, game_key: tp.Hashable = None) -> Action:
+        """
+        Search from obs and return ``(rank, opponent_seat)``.
+
+        The tree is kept between calls sharing the same game_key.
+        """
+        if game_key != self._game_key or self._root is None:
+            self._root = Node()
+            self._game_key = game_key
+        if self._sim is None or self._sim.num_players != len(obs.hand_sizes):
+            self._sim = BitGame([memory_strategy] * len(obs.hand_sizes), self.rng)
+        root = self._root
+        start = time.perf_counter()
+        deadline = start + self.time_budget if self.time_budget is not None else math.inf
+        n = 0
+        while (self.iterations is None or n < self.iterations) and \
+                (n & 15 or time.perf_counter() < deadline):
+            self._iterate(root, obs)
+            n += 1
+        self.last_iterations = n
+        self.total_iterations += n
+        self.total_time += time.perf_counter() - start
+        legal = self._actions(obs.hand, obs.seat, len(obs.hand_sizes))
+        action = max(legal, key=lambda a: root.children[a].visits if a in root.children else -1)
+        self._root = root.children.get(action)
+        return action
+
+    @staticmethod
+    def _actions(hand: int, seat: int, num_players: int) -> tp.List[Action]:
+        opps = [s for s in range(num_players) if s != seat]
+        return [(r, o) for r in held_ranks(hand) for o in opps]
+
+    def determinize(self, obs: Observation, tries: int = 20) -> BitGame:
+        """
+        Load the simulator with hidden cards dealt at random, consistent with obs.
+
+        Like ``endgame.sample_hidden`` every opponent gets its known ranks, at
+        most one card of a rank and none of its denied ranks, which are dropped
+        on the last try. Should no try succeed the cards are dealt unchecked.
+        """
+        unseen = [*mask_indexes(FULL_MASK & ~obs.hand & ~obs.laid)]
+        opps = obs.order[1:]
+        for attempt in range(tries + 1):
+            self.rng.shuffle(unseen)
+            hands = [0] * len(obs.hand_sizes)
+            hands[obs.seat] = obs.hand
+            if attempt == tries:
+                rest = unseen[:]
+                for s in opps:
+                    need = obs.hand_sizes[s]
+                    for i in rest[:need]:
+                        hands[s] |= 1 << i
+                    del rest[:need]
+                break
+            # Ranks each opponent holds or may not be dealt
+            held = [0] * len(hands)
+            left = list(obs.hand_sizes)
+            rest = []
+            for i in unseen:
+                rank_bit = 1 << INDEX_RANK[i]
+                for s in opps:
+                    if left[s] and obs.known[s] & rank_bit and not held[s] & rank_bit:
+                        hands[s] |= 1 << i
+                        held[s] |= rank_bit
+                        left[s] -= 1
+                        break
+                else:
+                    rest.append(i)
+            if attempt < tries - 1:
+                for s in opps:
+                    held[s] |= obs.excluded[s] & ~obs.known[s]
+            for s in opps:
+                keep = []
+                for i in rest:
+                    rank_bit = 1 << INDEX_RANK[i]
+                    if left[s] and not held[s] & rank_bit:
+                        hands[s] |= 1 << i
+                        held[s] |= rank_bit
+                        left[s] -= 1
+                    else:
+                        keep.append(i)
+                rest = keep
+            if not any(left[s] for s in opps):
+                break
+        self._sim.load(hands, obs.pairs, obs.laid, rest, obs.order)
+        return self._sim
+
+    def _iterate(self, root: Node, obs: Observation):
+        sim = self.determinize(obs)
+        seat = obs.seat
+        node = root
+        path = []
+        # Rank bits each seat is publicly known to hold or denied holding
+        shown = [_still_held(known, hand) for known, hand in zip(obs.known, sim.hands)]
+        denied = list(obs.excluded)
+        while not sim.game_over():
+            if sim.active != seat:
+                self._play(sim, shown, denied, *self._rollout_move(sim, shown, denied))
+                continue
+            odds = self._odds(sim, shown, denied)
+            # Of the asks for one rank only the likeliest to match is searched
+            best: tp.Dict[int, Action] = {}
+            for a, p in odds.items():
+                if a[0] not in best or p > odds[best[a[0]]]:
+                    best[a[0]] = a
+            actions = list(best.values())
+            untried = []
+            for a in actions:
+                child = node.children.get(a)
+                if child is None:
+                    untried.append(a)
+                else:
+                    child.avail += 1
+            if untried:
+                action = max(untried, key=odds.get)
+                child = node.children[action] = Node()
+                node = child
+            else:
+                log_avail = {a: math.log(node.children[a].avail) for a in actions}
+                action = max(actions, key=lambda a: self._ucb(node.children[a], log_avail[a]))
+                node = node.children[action]
+            path.append(node)
+            self._play(sim, shown, denied, *action)
+            if untried:
+                break
+        while not sim.game_over():
+            self._play(sim, shown, denied, *self._rollout_move(sim, shown, denied))
+        best = max(sim.pairs)
+        win = 1.0 / sim.pairs.count(best) if sim.pairs[seat] == best else 0.0
+        reward = (win + sim.pairs[seat] / max(sum(sim.pairs), 1)) / 2
+        for node in path:
+            node.visits += 1
+            node.wins += reward
+
+    @staticmethod
+    def _odds(sim: BitGame, shown: tp.List[int], denied: tp.List[int]) -> tp.Dict[Action, float]:
+        """
+        Chance that each ask of the active seat matches, from public knowledge and its own hand.
+
+        Like ``CardTracker.probability`` an opponent's unknown cards are draws
+        from the unseen ones, except for the ranks it denied holding.
+        """
+        seat = sim.active
+        hand = sim.hands[seat]
+        n = sim.num_players
+        opps = [sim.order[(sim.pos + k) % n] for k in range(1, n)]
+        unknown = [_popcount(sim.hands[o]) - _popcount(shown[o]) for o in range(n)]
+        seen = hand | sim.laid
+        unseen = NUM_CARDS - _popcount(seen) - sum(_popcount(shown[o]) for o in opps)
+        odds = {}
+        for rank in held_ranks(hand):
+            bit = 1 << rank
+            # One card of a rank at most in any hand, so a shown rank is one copy
+            hidden = (4 - _popcount(seen & RANK_MASKS[rank])
+                      - sum(shown[o] >> rank & 1 for o in opps))
+            for opp in opps:
+                if shown[opp] & bit:
+                    odds[rank, opp] = 1.0
+                elif denied[opp] & bit or not hidden:
+                    odds[rank, opp] = 0.0
+                else:
+                    odds[rank, opp] = 1 - (1 - unknown[opp] / unseen) ** hidden
+        return odds
+
+    def _rollout_move(self, sim: BitGame, shown: tp.List[int], denied: tp.List[int]) -> Action:
+        """Play like ``CardTracker.best_ask``: the ask most likely to match, ties in turn order."""
+        odds = self._odds(sim, shown, denied)
+        return max(odds, key=odds.get)
+
+    @staticmethod
+    def _play(sim: BitGame, shown: tp.List[int], denied: tp.List[int], rank: int, opp: int):
+        """Play the active seat's ask and update what everyone saw of the two hands."""
+        seat = sim.active
+        bit = 1 << rank
+        outcome = sim.play_move(rank, opp)
+        shown[seat] |= bit
+        denied[seat] &= ~bit
+        if outcome is not TurnOutcomes.ASKED_MATCH:
+            denied[opp] |= bit
+            if outcome is TurnOutcomes.FISH_NONE:
+                # Drew a card nobody saw
+                denied[seat] = 0
+        # Cards only leave a hand in public, given away or laid down
+        for s in (seat, opp):
+            shown[s] = _still_held(shown[s], sim.hands[s])
+
+    def _ucb(self, node: Node, log_avail: float) -> float:
+        return node.wins / node.visits + self.exploration * math.sqrt(log_avail / node.visits)
@@ -0,0 +1,311 @@
+"""
+Self-play training of a learned ask policy in pure NumPy.
+
+Every candidate ask ``(rank, opponent)`` of a decision is encoded from the
+asker's ``CardTracker`` into a row of ``NUM_FEATURES`` floats, see
+``FEATURES``, and a ``PolicyModel`` (linear or one hidden layer) scores the
+rows, the highest scoring ask is played. Models are fitted to the pairs
+margin each ask led to: the asker's pairs gained from the decision to the end
+of the game, minus the mean gain of its opponents.
+
+``SelfPlay`` runs many headless tables in lockstep and scores the decisions
+of all of them with one forward pass per step. The first iteration learns
+from the built-in AI's choices, later ones from the current model, both with
+epsilon-random exploration. Chunks of games run on a process pool.
+``policy_strategy`` plays a model as a ``turn.Strategy``, one decision takes
+well under a millisecond, and ``sprt.run_match`` measures it against the
+built-in AI.
+
+Usage: ``python -m gofish.learn policy.npz --iterations 4 --games 4000 --workers 4``
+"""
+import argparse
+import random
+import time
+import typing as tp
+
+import numpy as np
+
+from gofish.engine import HeadlessGoFish, build_ai_players
+from gofish.sprt import run_match
+from gofish.tournament import chunk_seed, map_chunks
+from gofish.turn import Strategy, ai_strategy, chosen_opp
+
+if tp.TYPE_CHECKING:
+    from gofish.player import AnyPlayer
+    from gofish.turn import Turn
+
+RANKS = range(1, 14)
+FEATURES = (
+    'bias',
+    'p_holds',          # CardTracker.probability of the opponent holding the rank
+    'known',            # the opponent certainly holds the rank
+    'excluded',         # the opponent denied the rank since its last unseen draw
+    'unseen_rank',      # unseen cards of the rank, per copy in play
+    'unseen_total',     # unseen cards, per card in play
+    'opp_size',         # opponent hand size / 10
+    'opp_unknown',      # opponent cards we cannot place / 10
+    'own_size',         # asker hand size / 10
+    'deck',             # deck size, per card in play
+    'pair_lead',        # asker pairs minus opponent pairs / 13
+    'opp_distance',     # opponent's place in the turn order, 0 for next to play
+    'rank_known_elsewhere',  # share of opponents certainly holding the rank
+    'own_count',        # asker cards of the rank, per copy in play
+)
+NUM_FEATURES = len(FEATURES)
+
+Action = tp.Tuple[int, 'AnyPlayer']
+
+
+def encode(turn: 'Turn') -> tp.Tuple[np.ndarray, tp.List[Action]]:
+    """Feature rows of every ask the active AiPlayer can make, and the matching actions."""
+    me = turn.active
+    t = me.beliefs
+    game = turn.game
+    copies = game.rules.copies
+    num_cards = game.rules.num_cards
+    opps = game.turn_order
+    held = [r for r in RANKS if t.certain[me] & (1 << r)]
+    elsewhere = {r: sum(t.certain[o] >> r & 1 for o in opps) / len(opps) for r in held}
+    common = (t.unseen_total / num_cards, len(me.hand) / 10, len(game.deck) / num_cards)
+    rows = []
+    actions = []
+    for k, o in enumerate(opps):
+        size = t.sizes[o]
+        known = t.known[o]
+        excluded = t.excluded[o]
+        per_opp = (size / 10, (size - t.known_total[o]) / 10, *common,
+                   (me.num_pairs - o.num_pairs) / 13, k / len(opps))
+        for r in held:
+            rows.append((1.0, t.probability(o, r), known[r] > 0, excluded >> r & 1,
+                         t.unseen[r] / copies, *per_opp, elsewhere[r],
+                         me.hand.rank_count(r) / copies))
+            actions.append((r, o))
+    return np.array(rows, dtype=np.float64).reshape(-1, NUM_FEATURES), actions
+
+
+class PolicyModel:
+    """
+    Scores feature rows with a linear model or an MLP of one ReLU hidden layer.
+
+    :param hidden: hidden units, 0 for a linear model.
+    """
+
+    def __init__(self, hidden: int = 32, seed: int = 0):
+        rng = np.random.default_rng(seed)
+        sizes = [NUM_FEATURES, hidden, 1] if hidden else [NUM_FEATURES, 1]
+        self.weights = [rng.normal(0, np.sqrt(2 / n_in), (n_in, n_out))
+                        for n_in, n_out in zip(sizes, sizes[1:])]
+        self.biases = [np.zeros(n_out) for n_out in sizes[1:]]
+
+    @property
+    def hidden(self) -> int:
+        return self.weights[0].shape[1] if len(self.weights) > 1 else 0
+
+    def _forward(self, x: np.ndarray) -> tp.List[np.ndarray]:
+        activations = [x]
+        for n, (w, b) in enumerate(zip(self.weights, self.biases)):
+            x = x @ w + b
+            if n < len(self.weights) - 1:
+                x = np.maximum(x, 0.0)
+            activations.append(x)
+        return activations
+
+    def predict(self, x: np.ndarray) -> np.ndarray:
+        """Score of every row of x."""
+        return self._forward(x)[-1][:, 0]
+
+    def fit(self, x: np.ndarray, y: np.ndarray, epochs: int = 5, batch_size: int = 256,
+            lr: float = 1e-3, seed: int = 0) -> float:
+        """Minimise the squared error to y with Adam, returns the last epoch's mean loss."""
+        rng = np.random.default_rng(seed)
+        params = [*self.weights, *self.biases]
+        m = [np.zeros_like(p) for p in params]
+        v = [np.zeros_like(p) for p in params]
+        step = 0
+        loss = 0.0
+        for _ in range(epochs):
+            order = rng.permutation(len(x))
+            total = 0.0
+            for start in range(0, len(x), batch_size):
+                idx = order[start:start + batch_size]
+                acts = self._forward(x[idx])
+                err = acts[-1][:, 0] - y[idx]
+                total += float(err @ err)
+                grad = (2 / len(idx)) * err[:, None]
+                grads_w = [None] * len(self.weights)
+                grads_b = [None] * len(self.biases)
+                for n in reversed(range(len(self.weights))):
+                    grads_w[n] = acts[n].T @ grad
+                    grads_b[n] = grad.sum(0)
+                    if n:
+                        grad = (grad @ self.weights[n].T) * (acts[n] > 0)
+                step += 1
+                for p, g, m_, v_ in zip(params, [*grads_w, *grads_b], m, v):
+                    m_ *= 0.9
+                    m_ += 0.1 * g
+                    v_ *= 0.999
+                    v_ += 0.001 * g * g
+                    p -= lr * (m_ / (1 - 0.9 ** step)) / (np.sqrt(v_ / (1 - 0.999 ** step)) + 1e-8)
+            loss = total / len(x)
+        return loss
+
+    def save(self, path: str):
+        np.savez(path, **{f'w{n}': w for n, w in enumerate(self.weights)},
+                 **{f'b{n}': b for n, b in enumerate(self.biases)})
+
+    @classmethod
+    def load(cls, path: str) -> 'PolicyModel':
+        with np.load(path) as data:
+            layers = sum(1 for key in data.files if key.startswith('w'))
+            model = cls(hidden=data['w0'].shape[1] if layers > 1 else 0)
+            model.weights = [data[f'w{n}'] for n in range(layers)]
+            model.biases = [data[f'b{n}'] for n in range(layers)]
+        return model
+
+
+def policy_strategy(model: PolicyModel) -> Strategy:
+    """A Strategy playing the model's highest scoring ask."""
+    def choose(turn: 'Turn'):
+        rows, actions = encode(turn)
+        rank, turn.opponent = actions[int(np.argmax(model.predict(rows)))]
+        turn.wanted_card = turn.active.hand.rank_card(rank)
+    return Strategy(choose, chosen_opp)
+
+
+class SelfPlay:
+    """
+    Headless tables advanced in lockstep, one forward pass per step for all of them.
+
+    :param model: policy of every seat, None to follow the built-in AI.
+    :param epsilon: chance of a uniformly random ask instead.
+    :param tables: games in flight at once, the batch size of inference.
+    """
+
+    def __init__(self, model: tp.Optional[PolicyModel] = None, num_players: int = 4,
+                 epsilon: float = 0.1, tables: int = 64, seed: tp.Optional[int] = None):
+        self.model = model
+        self.num_players = num_players
+        self.epsilon = epsilon
+        self.tables = tables
+        self.seeds = random.Random(seed)
+        self.explore = random.Random(self.seeds.getrandbits(64))
+
+    def _deal(self, game: HeadlessGoFish) -> bool:
+        game.rng.seed(self.seeds.getrandbits(64))
+        game.new_game()
+        game.next_turn()
+        return not game.game_over()
+
+    def run(self, n_games: int) -> tp.Tuple[np.ndarray, np.ndarray]:
+        """Play n_games, return every decision's chosen feature row and its pairs margin."""
+        xs: tp.List[np.ndarray] = []
+        ys: tp.List[float] = []
+        started = 0
+        live = []
+        while started < n_games or live:
+            while started < n_games and len(live) < self.tables:
+                game = HeadlessGoFish(build_ai_players([ai_strategy] * self.num_players))
+                started += 1
+                if self._deal(game):
+                    live.append((game, []))
+            if not live:
+                break
+            encoded = [encode(game.turn) for game, _ in live]
+            if self.model is not None:
+                scores = self.model.predict(np.concatenate([rows for rows, _ in encoded]))
+                bounds = np.cumsum([0, *(len(rows) for rows, _ in encoded)])
+            still = []
+            for n, ((game, decisions), (rows, actions)) in enumerate(zip(live, encoded)):
+                turn = game.turn
+                if self.explore.random() < self.epsilon:
+                    pick = self.explore.randrange(len(actions))
+                elif self.model is None:
+                    turn.choose()
+                    pick = actions.index((turn.wanted_card.rank, turn.opponent))
+                else:
+                    pick = int(np.argmax(scores[bounds[n]:bounds[n + 1]]))
+                rank, turn.opponent = actions[pick]
+                turn.wanted_card = turn.active.hand.rank_card(rank)
+                decisions.append((rows[pick], game.seat_index[turn.active],
+                                  [p.num_pairs for p in game.players]))
+                turn.resolve()
+                game.advance(turn)
+                if not game.game_over():
+                    still.append((game, decisions))
+                    continue
+                final = [p.num_pairs for p in game.players]
+                for row, seat, before in decisions:
+                    gains = [f - b for f, b in zip(final, before)]
+                    mine = gains.pop(seat)
+                    xs.append(row)
+                    ys.append(mine - sum(gains) / len(gains))
+            live = still
+        return np.array(xs).reshape(-1, NUM_FEATURES), np.array(ys)
+
+
+def generate_chunk(model: tp.Optional[PolicyModel], epsilon: float, n_games: int,
+                   seed: int) -> tp.Tuple[np.ndarray, np.ndarray]:
+    """Worker entry point: self-play n_games and return their decisions."""
+    return SelfPlay(model, epsilon=epsilon, seed=seed).run(n_games)
+
+
+def generate(model: tp.Optional[PolicyModel], n_games: int, seed: int = 0, epsilon: float = 0.1,
+             workers: tp.Optional[int] = None, chunk_size: int = 500
+             ) -> tp.Tuple[np.ndarray, np.ndarray]:
+    """Self-play n_games in seeded chunks, see ``tournament.map_chunks``."""
+    chunks = list(map_chunks(generate_chunk, n_games, seed, workers, chunk_size, (model, epsilon)))
+    return np.concatenate([x for x, _ in chunks]), np.concatenate([y for _, y in chunks])
+
+
+def decision_latency(model: PolicyModel, n: int = 2000, seed: int = 0) -> float:
+    """Mean seconds per ``policy_strategy`` decision over the turns of headless games."""
+    game = HeadlessGoFish(build_ai_players([policy_strategy(model)] * 4), random.Random(seed))
+    elapsed = 0.0
+    decisions = 0
+    while decisions < n:
+        game.new_game()
+        turn = game.next_turn()
+        while not game.game_over():
+            start = time.perf_counter()
+            turn.choose()
+            elapsed += time.perf_counter() - start
+            decisions += 1
+            turn.resolve()
+            turn = game.advance(turn)
+    return elapsed / decisions
+
+
+def main(argv: tp.Optional[tp.Sequence[str]] = None):
+    parser = argparse.ArgumentParser(prog='gofish.learn', description=__doc__.splitlines()[1])
+    parser.add_argument('path', help='.npz file the model is saved to')
+    parser.add_argument('--iterations', type=int, default=4)
+    parser.add_argument('--games', type=int, default=4000, help='self-play games per iteration')
+    parser.add_argument('--hidden', type=int, default=32, help='hidden units, 0 for a linear model')
+    parser.add_argument('--epsilon', type=float, default=0.1)
+    parser.add_argument('--epochs', type=int, default=5)
+    parser.add_argument('--keep', type=int, default=2, help='iterations of data to train on')
+    parser.add_argument('--eval-games', type=int, default=4000,
+                        help='cap of the SPRT match vs builtin')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args(argv)
+    model = PolicyModel(args.hidden, args.seed)
+    teacher = None
+    data = []
+    for it in range(args.iterations):
+        x, y = generate(teacher, args.games, chunk_seed(args.seed, it), args.epsilon, args.workers)
+        data = [*data, (x, y)][-args.keep:]
+        loss = model.fit(np.concatenate([d[0] for d in data]), np.concatenate([d[1] for d in data]),
+                         args.epochs, seed=args.seed + it)
+        model.save(args.path)
+        match = run_match(policy_strategy(model), ai_strategy, max_games=args.eval_games,
+                          seed=args.seed + it)
+        print(f'iteration {it}: {len(x)} decisions, loss {loss:.3f}, '
+              f'vs builtin {match.decision.value} after {match.games} games, '
+              f'score {match.score:.3f} ({match.elo:+.1f} Elo)')
+        teacher = model
+    print(f'decision latency {decision_latency(model) * 1e6:.0f} us')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,9 @@
-from collections import defaultdict
 from types import MethodType
 from typing import Union
 
-from gofish.card import Hand, Card
+from gofish.beliefs import CardTracker
+from gofish.card import Hand
+from gofish.endgame import EndgameSolver
 
 bound_method = MethodType
 
@@ -18,8 +19,16 @@ class Player:
     def __str__(self):
         return self._name
 
-    def collect_pairs(self):
-        self.pairs.extend(self.hand.extract_pairs())
+    def reset(self):
+        """Clear hand and pairs so the player can sit at a new game."""
+        self.hand.clear_hand()
+        self.pairs.clear()
+
+    def collect_pairs(self, set_size: int = 2):
+        """Lay down every pair (or book of set_size) in hand and return the new ones."""
+        new_pairs = self.hand.extract_pairs(set_size)
+        self.pairs.extend(new_pairs)
+        return new_pairs
 
     @property
     def num_cards(self):
@@ -59,16 +68,14 @@ class HumanPlayer(Player):
 
 
 class AiPlayer(Player):
-    def __init__(self, idnum: int):
+    def __init__(self, idnum: int, strategy=None):
         super().__init__(f'COMPUTER_{idnum}', False)
         self._sort_order = float(idnum)
-        self.opp_choices = defaultdict(set)
-
-    def remember(self, player: 'AnyPlayer', asked_card: Card):
-        self.opp_choices[player].add(asked_card)
-
-    def forget(self, player: 'AnyPlayer', asked_card: Card):
-        self.opp_choices[player].discard(asked_card)
+        self.beliefs = CardTracker(self)
+        # Searched exactly once the deck is this small, None to never switch
+        self.endgame = EndgameSolver()
+        # turn.Strategy played on this player's turns, None means the built-in AI
+        self.strategy = strategy
 
 
 AnyPlayer = Union[HumanPlayer, AiPlayer]
@@ -0,0 +1,164 @@
+"""
+Incremental Elo ratings for AI strategies, kept in a local JSON file.
+
+A game of n players counts as every pair of them playing one heads-up game
+decided by pairs, so a ranking updates each rating once in O(n^2) with no
+replay of history. Ratings live in memory and are written in bulk, every
+``save_every`` games and on ``close``, through a temporary file that is
+renamed over the store so readers never see a partial write.
+
+Usage: ``python -m gofish.ratings ratings.json builtin greedy random -n 10000``
+plays and rates a run, ``python -m gofish.ratings ratings.json --top 10``
+lists the best rated strategies.
+"""
+import argparse
+import collections as coll
+import json
+import os
+import tempfile
+import typing as tp
+
+from gofish.engine import GameResult, play_games
+from gofish.tournament import STRATEGIES
+
+VERSION = 1
+
+
+class RatingStore:
+    """
+    Elo rating and games played per strategy name.
+
+    :param path: JSON file to load from and save to, None to keep ratings in memory.
+    :param k: Elo K-factor of a game.
+    :param provisional: games over which a new name's updates are doubled.
+    :param save_every: games between automatic saves, 0 to only save on ``save``/``close``.
+    """
+
+    def __init__(self, path: tp.Optional[tp.Union[str, os.PathLike]] = None, k: float = 16.0,
+                 provisional: int = 30, initial: float = 1500.0, save_every: int = 10000):
+        self.path = path
+        self.k = k
+        self.provisional = provisional
+        self.initial = initial
+        self.save_every = save_every
+        self.ratings: tp.Dict[str, tp.List[float]] = {}
+        self.unsaved = 0
+        if path is not None and os.path.exists(path):
+            with open(path) as f:
+                data = json.load(f)
+            if data.get('version') != VERSION:
+                raise ValueError(f'{path} is not a version {VERSION} rating store.')
+            self.ratings = {name: [elo, games] for name, (elo, games) in data['ratings'].items()}
+
+    def __len__(self):
+        return len(self.ratings)
+
+    def __contains__(self, name: str):
+        return name in self.ratings
+
+    def rating(self, name: str) -> float:
+        return self.ratings[name][0] if name in self.ratings else self.initial
+
+    def games(self, name: str) -> int:
+        return int(self.ratings[name][1]) if name in self.ratings else 0
+
+    def record(self, names: tp.Sequence[str], pairs: tp.Sequence[int]):
+        """
+        Rate one game from each seat's strategy name and pair count, in any order.
+
+        Seats sharing a name are one entry: the game counts once for it and its
+        update is the mean over its seats' games against the other names.
+        """
+        seats = coll.Counter(names)
+        if len(seats) < 2:
+            raise ValueError('A rated game needs at least two strategy names.')
+        entries = {name: self.ratings.setdefault(name, [self.initial, 0]) for name in seats}
+        elos = {name: entry[0] for name, entry in entries.items()}
+        deltas = dict.fromkeys(seats, 0.0)
+        for mine, name in zip(pairs, names):
+            for theirs, other in zip(pairs, names):
+                if other != name:
+                    expected = 1 / (1 + 10 ** ((elos[other] - elos[name]) / 400))
+                    actual = 1.0 if mine > theirs else 0.5 if mine == theirs else 0.0
+                    deltas[name] += actual - expected
+        n = len(names)
+        for name, entry in entries.items():
+            k = self.k * 2 if entry[1] < self.provisional else self.k
+            entry[0] += k * deltas[name] / (seats[name] * (n - seats[name]))
+            entry[1] += 1
+        self.unsaved += 1
+        if self.save_every and self.unsaved >= self.save_every:
+            self.save()
+
+    def record_result(self, result: GameResult, names: tp.Sequence[str]):
+        """Rate a headless game, names holds the strategy name of each seat."""
+        self.record(names, result.pairs)
+
+    def record_ranking(self, ranked: tp.Sequence[tp.Any], name: tp.Callable[[tp.Any], str]):
+        """Rate the players returned by ``GoFish.score_game``, name gives a player's strategy."""
+        self.record([name(p) for p in ranked], [p.num_pairs for p in ranked])
+
+    def top(self, n: int = 10, min_games: int = 0) -> tp.List[tp.Tuple[str, float, int]]:
+        """The n best ``(name, elo, games)``, e.g. to pick the bots for a live table."""
+        rated = [(name, elo, int(games)) for name, (elo, games) in self.ratings.items()
+                 if games >= min_games]
+        rated.sort(key=lambda r: r[1], reverse=True)
+        return rated[:n]
+
+    def save(self):
+        """Write every rating at once, atomically replacing the store file."""
+        if self.path is None:
+            self.unsaved = 0
+            return
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp = tempfile.mkstemp(prefix='.ratings-', suffix='.tmp', dir=directory)
+        try:
+            # mkstemp creates the file private, keep the store's mode instead
+            mode = os.stat(self.path).st_mode & 0o777 if os.path.exists(self.path) else 0o644
+            os.chmod(tmp, mode)
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'version': VERSION, 'ratings': self.ratings}, f, separators=(',', ':'))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        self.unsaved = 0
+
+    def close(self):
+        if self.unsaved:
+            self.save()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main(argv: tp.Optional[tp.Sequence[str]] = None):
+    parser = argparse.ArgumentParser(prog='gofish.ratings', description=__doc__.splitlines()[1])
+    parser.add_argument('path')
+    parser.add_argument('strategies', nargs='*', metavar='strategy',
+                        help=f'strategy for each seat, one of {", ".join(sorted(STRATEGIES))}')
+    parser.add_argument('-n', '--games', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args(argv)
+    unknown = set(args.strategies) - STRATEGIES.keys()
+    if unknown:
+        parser.error(f'unknown strategies: {", ".join(sorted(unknown))}')
+    if len(set(args.strategies)) == 1:
+        parser.error('rating needs at least two different strategies')
+    with RatingStore(args.path) as store:
+        if args.strategies:
+            strategies = [STRATEGIES[n] for n in args.strategies]
+            for result in play_games(args.games, args.seed, strategies=strategies):
+                store.record_result(result, args.strategies)
+    for rank, (name, elo, games) in enumerate(store.top(args.top), start=1):
+        print(f'{rank:>3}. {name:<20}{elo:>8.1f}{games:>10}')
+
+
+if __name__ == '__main__':
+    main()
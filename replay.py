@@ -0,0 +1,90 @@
+"""
+Compact game replays: a seed plus the (rank, opponent seat) asked on every turn.
+
+The seed fixes the deal and seat order, the decisions fix everything the
+strategies chose, so ``replay_game`` regenerates a recorded game under the
+recorded ``Rules`` exactly without storing any trace of hands or draws.
+"""
+import collections as coll
+import random
+import struct
+import typing as tp
+
+from gofish.engine import HeadlessGoFish, HeadlessTurn, build_ai_players
+from gofish.rules import DEFAULT_RULES, EndCondition, Rules
+from gofish.turn import Strategy, ai_strategy, chosen_opp
+
+Replay = coll.namedtuple('Replay', 'seed num_players decisions rules', defaults=(DEFAULT_RULES,))
+
+# seed, num_players, decision count, then the Rules fields
+_HEADER = struct.Struct('<QBIBBBBB')
+
+
+class RecordingTurn(HeadlessTurn):
+    def enter(self):
+        super().enter()
+        self.game.decisions.append((self.wanted_card.rank, self.game.players.index(self.opponent)))
+        return self
+
+
+class RecordingGoFish(HeadlessGoFish):
+    """HeadlessGoFish that logs every decision to ``decisions``."""
+
+    turn_class = RecordingTurn
+
+    def __init__(self, players, rng: tp.Optional[random.Random] = None,
+                 rules: Rules = DEFAULT_RULES):
+        super().__init__(players, rng, rules)
+        self.decisions: tp.List[tp.Tuple[int, int]] = []
+        self.pending: tp.Iterator[tp.Tuple[int, int]] = iter(())
+
+    def new_game(self, first=False):
+        self.decisions.clear()
+        super().new_game(first)
+
+
+def replay_choose_card(turn):
+    rank, seat = next(turn.game.pending)
+    turn.wanted_card = turn.active.hand.rank_card(rank)
+    turn.opponent = turn.game.players[seat]
+    return turn
+
+
+replay_strategy = Strategy(replay_choose_card, chosen_opp)
+
+
+def record_game(seed: int, strategies: tp.Sequence[Strategy] = (ai_strategy,) * 4,
+                rules: Rules = DEFAULT_RULES) -> tp.Tuple[Replay, RecordingGoFish]:
+    """Play one headless game from seed and return its Replay and the finished game."""
+    game = RecordingGoFish(build_ai_players(strategies), rules=rules)
+    game.rng.seed(seed)
+    game.play()
+    return Replay(seed, len(strategies), tuple(game.decisions), rules), game
+
+
+def replay_game(replay: Replay) -> RecordingGoFish:
+    """Regenerate a recorded game and return it finished."""
+    game = RecordingGoFish(build_ai_players([replay_strategy] * replay.num_players),
+                           rules=replay.rules)
+    game.pending = iter(replay.decisions)
+    game.rng.seed(replay.seed)
+    game.play()
+    return game
+
+
+def encode(replay: Replay) -> bytes:
+    """Pack a Replay into an 18 byte header and two bytes per decision."""
+    rules = replay.rules
+    header = _HEADER.pack(replay.seed, replay.num_players, len(replay.decisions), rules.hand_size,
+                          rules.max_players, rules.num_decks, rules.set_size, rules.end.value)
+    return header + bytes(b for decision in replay.decisions for b in decision)
+
+
+def decode(data: bytes) -> Replay:
+    seed, num_players, count, hand_size, max_players, num_decks, set_size, end = \
+        _HEADER.unpack_from(data)
+    body = data[_HEADER.size:_HEADER.size + 2 * count]
+    if len(body) != 2 * count:
+        raise ValueError(f'Replay truncated: expected {count} decisions.')
+    rules = Rules(hand_size, max_players, num_decks, set_size, EndCondition(end))
+    return Replay(seed, num_players, tuple(zip(body[::2], body[1::2])), rules)
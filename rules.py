@@ -0,0 +1,55 @@
+"""Table rules: hand size, seats, decks, what gets laid down and when the game ends."""
+import collections as coll
+import enum
+
+CARDS_PER_DECK = 52
+SUITS_PER_DECK = 4
+
+
+class EndCondition(enum.Enum):
+    #: the game ends as soon as the deck or any hand runs out
+    FIRST_OUT = 1
+    #: the game ends when the deck runs out, an empty hand draws a card on its turn
+    DECK_OUT = 2
+
+
+class Rules(coll.namedtuple('Rules', 'hand_size max_players num_decks set_size end')):
+    """
+    Immutable rule set shared by a game's ``Deck``, ``Hand`` s and ``GoFish``.
+
+    ``set_size`` is the number of same rank cards laid down together, 2 for
+    pairs or 4 for books. ``num_decks`` standard decks are shuffled together.
+    """
+
+    __slots__ = ()
+
+    def __new__(cls, hand_size: int = 7, max_players: int = 6, num_decks: int = 1,
+                set_size: int = 2, end: EndCondition = EndCondition.FIRST_OUT):
+        if not 2 <= set_size <= SUITS_PER_DECK * num_decks:
+            raise ValueError(f'Cannot lay down sets of {set_size} with {num_decks} deck(s).')
+        if hand_size * max_players > CARDS_PER_DECK * num_decks:
+            raise ValueError(f'{max_players} hands of {hand_size} do not fit in '
+                             f'{num_decks} deck(s).')
+        return super().__new__(cls, hand_size, max_players, num_decks, set_size, end)
+
+    @property
+    def num_cards(self) -> int:
+        return CARDS_PER_DECK * self.num_decks
+
+    @property
+    def copies(self) -> int:
+        """Cards of each rank in play."""
+        return SUITS_PER_DECK * self.num_decks
+
+    def check_players(self, num_players: int):
+        if not 2 <= num_players <= self.max_players:
+            raise ValueError(f'These rules seat 2-{self.max_players} players, not {num_players}.')
+
+    @classmethod
+    def for_table(cls, num_players: int, hand_size: int = 7, **kwargs) -> 'Rules':
+        """Rules seating num_players with just enough decks for the deal."""
+        num_decks = max(1, -(-hand_size * num_players // CARDS_PER_DECK))
+        return cls(hand_size, num_players, num_decks, **kwargs)
+
+
+DEFAULT_RULES = Rules()
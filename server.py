@@ -0,0 +1,328 @@
+"""
+Host many Go Fish tables on one asyncio event loop.
+
+Human seats are line-protocol clients over TCP or a Unix socket, AI seats run
+inline. Every server line is ``<TAG> <text>``:
+
+- ``MSG <text>``: game output.
+- ``HAND <cards>``: the seat's current hand, tab separated.
+- ``ASK <NAME|CARD|OPP|HAVE> <text>``: a prompt, answered by one line.
+- ``END <text>``: the table is finished.
+
+Usage: ``python -m gofish.server --port 8765 --humans 1 --ai 3``
+"""
+import argparse
+import asyncio
+import random
+import typing as tp
+from string import ascii_letters
+
+from gofish.card import Card
+from gofish.engine import HeadlessGoFish, HeadlessTurn
+from gofish.interaction import GameStrings, Message, MessageQueue, MessageSink, render
+from gofish.player import AiPlayer, AnyPlayer, HumanPlayer
+from gofish.turn import Turn
+
+
+class SeatClosed(ConnectionError):
+    """A remote seat disconnected in the middle of a game."""
+
+
+class RemoteSeat:
+    """One connected client speaking the line protocol."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.player: tp.Optional[HumanPlayer] = None
+        self.done = asyncio.Event()
+
+    def send(self, tag: str, text: str = ''):
+        for line in text.strip('\n').split('\n'):
+            self.writer.write(f'{tag} {line}\n'.encode())
+
+    async def ask(self, kind: str, prompt: str) -> str:
+        """Send a prompt and wait for the answer line."""
+        *lines, last = prompt.strip('\n').split('\n')
+        if lines:
+            self.send('MSG', '\n'.join(lines))
+        self.send(f'ASK {kind}', last)
+        await self.drain()
+        try:
+            line = await self.reader.readline()
+        except ConnectionError as exc:
+            raise SeatClosed(f'{self.player or "Client"} disconnected.') from exc
+        if not line:
+            raise SeatClosed(f'{self.player or "Client"} disconnected.')
+        return line.decode().strip()
+
+    async def drain(self):
+        """Wait for the sent lines to flush, a reset connection raises SeatClosed."""
+        try:
+            await self.writer.drain()
+        except ConnectionError as exc:
+            raise SeatClosed(f'{self.player or "Client"} disconnected.') from exc
+
+    @property
+    def closed(self) -> bool:
+        """Whether the client hung up or the seat was closed."""
+        return self.writer.is_closing() or self.reader.at_eof()
+
+    def show_hand(self):
+        self.send('HAND', '\t'.join(map(str, self.player.hand)))
+
+    async def close(self):
+        self.done.set()
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+class AsyncPrompts:
+    """Awaitable counterparts of the ``GamePrompts`` decision points."""
+
+    strings = GameStrings
+
+    async def get_name(self, seat: RemoteSeat) -> str:
+        while True:
+            answer = await seat.ask('NAME', self.strings.GET_NAME)
+            if answer and all(s in ascii_letters for s in answer):
+                return answer
+            seat.send('MSG', self.strings.WRONG_STRING)
+
+    async def have_card(self, seat: RemoteSeat, turn: Turn, matched: bool):
+        seat.show_hand()
+        while True:
+            answer = await seat.ask('HAVE', render('HAVE_CARD', turn=turn))
+            lying = (answer == 'y' and not matched) or (answer == 'n' and matched)
+            if not lying:
+                return
+            seat.send('MSG', self.strings.STOP_CHEATING)
+
+    async def choose_card(self, seat: RemoteSeat) -> Card:
+        cards = seat.player.hand.stack
+        seat.show_hand()
+        seat.send('MSG', '\t'.join(f'{i:>4}' for i in range(1, len(cards) + 1)))
+        return await self._choose(seat, 'CARD', self.strings.GET_CARD_CHOICE, cards)
+
+    async def choose_opp(self, seat: RemoteSeat, others: tp.Sequence[AnyPlayer]) -> AnyPlayer:
+        seat.send('MSG', '\n'.join(f'{n}) {p!s}' for n, p in enumerate(others, start=1)))
+        return await self._choose(seat, 'OPP', self.strings.GET_OPP_CHOICE, others)
+
+    async def _choose(self, seat: RemoteSeat, kind: str, prompt: str, options: tp.Sequence):
+        while True:
+            answer = await seat.ask(kind, prompt)
+            if answer.isdigit():
+                if 1 <= int(answer) <= len(options):
+                    return options[int(answer) - 1]
+                seat.send('MSG', self.strings.WRONG_INDEX)
+                continue
+            seat.send('MSG', self.strings.WRONG_TYPE_NUM)
+
+
+class SeatSink(MessageSink):
+    """Broadcast executed game messages to every remote seat at a table."""
+
+    def __init__(self, seats: tp.Sequence[RemoteSeat]):
+        self.seats = seats
+
+    def write(self, message: Message):
+        text = message.text
+        for seat in self.seats:
+            seat.send('MSG', text)
+
+
+class TableGoFish(HeadlessGoFish):
+    """HeadlessGoFish whose human seats are remote clients."""
+
+    turn_class = HeadlessTurn
+
+    def __init__(self, seats: tp.Sequence[RemoteSeat], num_ai: int,
+                 rng: tp.Optional[random.Random] = None):
+        humans = [seat.player for seat in seats]
+        super().__init__([*humans, *(AiPlayer(n) for n in range(1, num_ai + 1))], rng)
+        self.seats = {seat.player: seat for seat in seats}
+        self.messages = MessageQueue([SeatSink(seats)])
+        self.prompts_async = AsyncPrompts()
+
+    async def play_turn(self, turn: Turn):
+        """``Turn.execute`` with the human decisions awaited instead of read from input()."""
+        if turn.active.is_human:
+            seat = self.seats[turn.active]
+            turn.wanted_card = await self.prompts_async.choose_card(seat)
+            others = [p for p in self.players if p is not turn.active]
+            turn.opponent = await self.prompts_async.choose_opp(seat, others)
+        else:
+            turn.choose()
+        if turn.opponent.is_human:
+            matched = turn.opponent.hand.has_match(turn.wanted_card) is not None
+            await self.prompts_async.have_card(self.seats[turn.opponent], turn, matched)
+        turn.resolve()
+        await asyncio.gather(*(seat.drain() for seat in self.seats.values()))
+
+    async def play_async(self) -> tp.List[AnyPlayer]:
+        self.new_game()
+        turn = self.next_turn()
+        while not self.game_over():
+            await self.play_turn(turn)
+            turn = self.advance(turn)
+            # Let the other tables run between turns
+            await asyncio.sleep(0)
+        self.messages.execute()
+        self.games_played += 1
+        ranked = self.score_game()
+        self.broadcast_scores(ranked)
+        return ranked
+
+    def broadcast_scores(self, ranked: tp.Sequence[AnyPlayer]):
+        for seat in self.seats.values():
+            seat.send('MSG', GameStrings.RANKINGS_HEADER)
+            for num, player in enumerate(ranked, start=1):
+                seat.send('MSG', render('PLAYERS_RANKED', num, player.name))
+            result = 'USER_WINS' if ranked[0] is seat.player else 'USER_LOSES'
+            seat.send('MSG', render(result, seat.player))
+
+
+class GoFishServer:
+    """
+    Seat incoming clients at tables of ``humans`` remote players plus ``num_ai`` AI players.
+
+    Each table runs as its own task, so any number of tables share the event loop.
+    """
+
+    def __init__(self, humans: int = 1, num_ai: int = 3, seed: tp.Optional[int] = None):
+        self.humans = humans
+        self.num_ai = num_ai
+        self.rng = random.Random(seed)
+        self.waiting: tp.List[RemoteSeat] = []
+        self.tables: tp.Set[asyncio.Task] = set()
+        self.finished = 0
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        seat = RemoteSeat(reader, writer)
+        try:
+            seat.player = HumanPlayer((await AsyncPrompts().get_name(seat)).upper())
+        except SeatClosed:
+            await seat.close()
+            return
+        self.waiting.append(seat)
+        # Clients that hung up while waiting are not seated
+        gone = [s for s in self.waiting if s.closed]
+        self.waiting = [s for s in self.waiting if not s.closed]
+        if len(self.waiting) >= self.humans:
+            seats, self.waiting = self.waiting[:self.humans], self.waiting[self.humans:]
+            self.open_table(seats)
+        for s in gone:
+            await s.close()
+        await seat.done.wait()
+
+    def open_table(self, seats: tp.Sequence[RemoteSeat]) -> asyncio.Task:
+        table = TableGoFish(seats, self.num_ai, random.Random(self.rng.getrandbits(64)))
+        task = asyncio.create_task(self.run_table(table))
+        self.tables.add(task)
+        task.add_done_callback(self.tables.discard)
+        return task
+
+    async def run_table(self, table: TableGoFish):
+        """Play a table's game, then end and close every seat however the game stopped."""
+        farewell = 'The table closed.'
+        try:
+            await table.play_async()
+            farewell = GameStrings.GAME_OVER.strip()
+        except SeatClosed as exc:
+            farewell = str(exc)
+        finally:
+            for seat in table.seats.values():
+                if not seat.writer.is_closing():
+                    seat.send('END', farewell)
+                await seat.close()
+            self.finished += 1
+
+    async def serve_tcp(self, host: str = '127.0.0.1', port: int = 8765,
+                        backlog: int = 1024) -> asyncio.AbstractServer:
+        return await asyncio.start_server(self.handle_client, host, port, backlog=backlog)
+
+    async def serve_unix(self, path: str, backlog: int = 1024) -> asyncio.AbstractServer:
+        return await asyncio.start_unix_server(self.handle_client, path, backlog=backlog)
+
+
+_FACE_RANKS = {face: rank for rank, face in Card.FACES.items()}
+
+
+def _parse_rank(card_str: str) -> int:
+    rank = card_str.strip('|')[:-1]
+    return _FACE_RANKS[rank] if rank in _FACE_RANKS else int(rank)
+
+
+async def bot_client(name: str, host: str = '127.0.0.1', port: int = 8765,
+                     path: tp.Optional[str] = None, rng: tp.Optional[random.Random] = None
+                     ) -> tp.List[str]:
+    """
+    Local stand-in for a human player: answers every prompt honestly at random.
+
+    Returns every line received, ending with the ``END`` line.
+    """
+    rng = rng or random.Random()
+    if path:
+        reader, writer = await asyncio.open_unix_connection(path)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+    lines = []
+    hand: tp.List[str] = []
+    options = 0
+    while True:
+        raw = await reader.readline()
+        if not raw:
+            break
+        line = raw.decode().rstrip('\n')
+        lines.append(line)
+        tag, _, text = line.partition(' ')
+        if tag == 'END':
+            break
+        if tag == 'HAND':
+            hand = text.split('\t') if text else []
+        elif tag == 'MSG' and text[:1].isdigit() and ')' in text:
+            options = int(text.split(')')[0])
+        elif tag == 'ASK':
+            kind, _, prompt = text.partition(' ')
+            if kind == 'NAME':
+                answer = name
+            elif kind == 'CARD':
+                answer = str(rng.randint(1, len(hand)))
+            elif kind == 'OPP':
+                answer = str(rng.randint(1, options))
+            else:
+                wanted = _parse_rank(lines[-2].split(' do you have a ')[1].split(' ')[0])
+                answer = 'y' if wanted in map(_parse_rank, hand) else 'n'
+            writer.write(f'{answer}\n'.encode())
+            await writer.drain()
+    writer.close()
+    return lines
+
+
+async def _serve(args):
+    server = GoFishServer(args.humans, args.ai, args.seed)
+    if args.unix:
+        listener = await server.serve_unix(args.unix)
+    else:
+        listener = await server.serve_tcp(args.host, args.port)
+    async with listener:
+        await listener.serve_forever()
+
+
+def main(argv: tp.Optional[tp.Sequence[str]] = None):
+    parser = argparse.ArgumentParser(prog='gofish.server', description=__doc__.splitlines()[1])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', help='listen on this Unix socket path instead of TCP')
+    parser.add_argument('--humans', type=int, default=1, help='remote seats per table')
+    parser.add_argument('--ai', type=int, default=3, help='AI seats per table')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args(argv)
+    asyncio.run(_serve(args))
+
+
+if __name__ == '__main__':
+    main()
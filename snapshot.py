@@ -0,0 +1,84 @@
+"""
+Immutable game snapshots for forking a game and checkpointing it to bytes.
+
+Cards are stored as ``Card.index`` bytes and seats as their index in
+``GoFish.players``, so a snapshot holds no references to live objects and
+can be restored into any game seated with the same players.
+"""
+import collections as coll
+import struct
+import typing as tp
+
+GameSnapshot = coll.namedtuple('GameSnapshot', 'turns order deck hands pairs trackers rng')
+GameSnapshot.__doc__ = """\
+A game at the start of a turn, see ``GoFish.snapshot``.
+
+``order`` holds the seats in turn order from the next to play, ``deck`` the
+cards from the top down, ``hands``/``pairs`` one bytes string per seat (pairs
+flattened), ``trackers`` each AI's ``CardTracker.snapshot`` or ``()`` for a
+human seat, and ``rng`` the game's ``random.Random`` state."""
+
+_HEADER = struct.Struct('<4sBBI')
+MAGIC = b'GFSN'
+VERSION = 3
+
+
+def _pack_varint(out: bytearray, value: int):
+    """Unsigned LEB128, as lengths and tracker fields can outgrow a fixed width."""
+    while value > 0x7F:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _unpack_varint(data: bytes, pos: int) -> tp.Tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def to_bytes(snap: GameSnapshot) -> bytes:
+    num = len(snap.hands)
+    out = bytearray(_HEADER.pack(MAGIC, VERSION, num, snap.turns))
+    for data in (snap.order, snap.deck, *snap.hands, *snap.pairs):
+        _pack_varint(out, len(data))
+        out += data
+    for state in snap.trackers:
+        _pack_varint(out, len(state))
+        for value in state:
+            _pack_varint(out, value)
+    version, internal, gauss = snap.rng
+    out += struct.pack(f'<BH{len(internal)}I?d', version, len(internal), *internal,
+                       gauss is not None, gauss or 0.0)
+    return bytes(out)
+
+
+def from_bytes(data: bytes) -> GameSnapshot:
+    magic, version, num, turns = _HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f'Not a version {VERSION} game snapshot.')
+    pos = _HEADER.size
+    fields = []
+    for _ in range(2 + 2 * num):
+        size, pos = _unpack_varint(data, pos)
+        fields.append(data[pos:pos + size])
+        pos += size
+    trackers = []
+    for _ in range(num):
+        size, pos = _unpack_varint(data, pos)
+        state = []
+        for _ in range(size):
+            value, pos = _unpack_varint(data, pos)
+            state.append(value)
+        trackers.append(tuple(state))
+    rng_version, size = struct.unpack_from('<BH', data, pos)
+    pos += 3
+    *internal, has_gauss, gauss = struct.unpack_from(f'<{size}I?d', data, pos)
+    return GameSnapshot(turns, fields[0], fields[1], tuple(fields[2:2 + num]),
+                        tuple(fields[2 + num:]), tuple(trackers),
+                        (rng_version, tuple(internal), gauss if has_gauss else None))
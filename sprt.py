@@ -0,0 +1,159 @@
+"""
+Sequential heads-up matches that stop as soon as the result is decided.
+
+A candidate strategy plays a baseline in duplicate pairs of games, the same
+deal once from each seat, and every finished pair feeds two sequential
+probability ratio tests on the candidate's Elo: ``0`` against ``+elo`` and
+``0`` against ``-elo``. The match stops once one of them accepts its
+alternative (better or worse) or both accept the null (equal), at the
+configured error rates, or at ``max_games``.
+
+The log-likelihood ratio uses the normal approximation of the generalised
+SPRT over pair scores, so draws and the correlation within a pair are
+accounted for by the observed variance.
+
+Usage: ``python -m gofish.sprt greedy builtin --elo 30 --max-games 20000``
+"""
+import argparse
+import collections as coll
+import enum
+import math
+import typing as tp
+
+from gofish.engine import play_duplicate
+from gofish.tournament import STRATEGIES
+from gofish.turn import Strategy, ai_strategy
+
+
+class Decision(enum.Enum):
+    BETTER = 'better'
+    WORSE = 'worse'
+    EQUAL = 'equal'
+    INCONCLUSIVE = 'inconclusive'
+
+
+MatchResult = coll.namedtuple('MatchResult', 'decision games score elo llr_better llr_worse')
+MatchResult.__doc__ = """\
+Outcome of ``run_match``: ``score`` is the candidate's mean score per game
+(1 win, 0.5 draw) and ``elo`` its Elo difference to the baseline."""
+
+
+def elo_to_score(elo: float) -> float:
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+def score_to_elo(score: float) -> float:
+    if score <= 0.0 or score >= 1.0:
+        return math.copysign(math.inf, score - 0.5)
+    return -400 * math.log10(1 / score - 1)
+
+
+class Sprt:
+    """
+    Running sums of pair scores and the two tests' log-likelihood ratios.
+
+    :param elo: Elo difference the better/worse alternatives assume.
+    :param alpha: chance of calling equal strategies better or worse.
+    :param beta: chance of calling a strategy ``elo`` apart equal.
+    :param min_pairs: pairs played before deciding, so a run of identical
+        scores (e.g. a deterministic strategy against itself) is not mistaken
+        for certainty too early.
+    """
+
+    def __init__(self, elo: float = 20.0, alpha: float = 0.05, beta: float = 0.05,
+                 min_pairs: int = 16):
+        self.elo = elo
+        self.min_pairs = min_pairs
+        self.lower = math.log(beta / (1 - alpha))
+        self.upper = math.log((1 - beta) / alpha)
+        self.n = 0
+        self.total = 0.0
+        self.squares = 0.0
+
+    def add(self, score: float):
+        self.n += 1
+        self.total += score
+        self.squares += score * score
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.n if self.n else 0.5
+
+    def llr(self, elo0: float, elo1: float) -> float:
+        """Log-likelihood ratio of Elo elo1 over elo0."""
+        if self.n < 2:
+            return 0.0
+        mean = self.mean
+        # Identical scores so far leave no spread to scale by, take a tiny one
+        var = max(self.squares / self.n - mean * mean, 1e-9)
+        s0, s1 = elo_to_score(elo0), elo_to_score(elo1)
+        return self.n * (s1 - s0) * (2 * mean - s0 - s1) / (2 * var)
+
+    def decision(self) -> tp.Optional[Decision]:
+        """The decided outcome, or None to keep playing."""
+        if self.n < self.min_pairs:
+            return None
+        better = self.llr(0.0, self.elo)
+        worse = self.llr(0.0, -self.elo)
+        if better >= self.upper:
+            return Decision.BETTER
+        if worse >= self.upper:
+            return Decision.WORSE
+        if better <= self.lower and worse <= self.lower:
+            return Decision.EQUAL
+        return None
+
+
+def pair_score(block, seats: int = 2) -> float:
+    """Candidate's mean score over one duplicate deal, it sits at seat k in game k."""
+    total = 0.0
+    for k, result in enumerate(block):
+        mine = result.pairs[k % seats]
+        best = max(result.pairs)
+        if mine == best:
+            total += 1 / result.pairs.count(best)
+    return total / len(block)
+
+
+def run_match(candidate: Strategy, baseline: Strategy = ai_strategy, elo: float = 20.0,
+              alpha: float = 0.05, beta: float = 0.05, max_games: int = 50000,
+              seed: tp.Optional[int] = None,
+              progress: tp.Optional[tp.Callable[[Sprt], tp.Any]] = None) -> MatchResult:
+    """
+    Play candidate against baseline until the SPRT decides or max_games are played.
+
+    :param progress: called with the test after every deal, e.g. to print the LLRs.
+    """
+    test = Sprt(elo, alpha, beta)
+    decision = Decision.INCONCLUSIVE
+    for block in play_duplicate(max_games // 2, seed, (candidate, baseline)):
+        test.add(pair_score(block))
+        if progress is not None:
+            progress(test)
+        found = test.decision()
+        if found is not None:
+            decision = found
+            break
+    return MatchResult(decision, 2 * test.n, test.mean, score_to_elo(test.mean),
+                       test.llr(0.0, elo), test.llr(0.0, -elo))
+
+
+def main(argv: tp.Optional[tp.Sequence[str]] = None):
+    parser = argparse.ArgumentParser(prog='gofish.sprt', description=__doc__.splitlines()[1])
+    parser.add_argument('candidate', choices=sorted(STRATEGIES))
+    parser.add_argument('baseline', nargs='?', default='builtin', choices=sorted(STRATEGIES))
+    parser.add_argument('--elo', type=float, default=20.0, help='Elo difference worth detecting')
+    parser.add_argument('--alpha', type=float, default=0.05)
+    parser.add_argument('--beta', type=float, default=0.05)
+    parser.add_argument('--max-games', type=int, default=50000)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args(argv)
+    r = run_match(STRATEGIES[args.candidate], STRATEGIES[args.baseline], args.elo, args.alpha,
+                  args.beta, args.max_games, args.seed)
+    print(f'{args.candidate} vs {args.baseline}: {r.decision.value} after {r.games} games, '
+          f'score {r.score:.3f} ({r.elo:+.1f} Elo), LLR better {r.llr_better:.2f} '
+          f'worse {r.llr_worse:.2f}')
+
+
+if __name__ == '__main__':
+    main()
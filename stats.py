@@ -0,0 +1,160 @@
+"""
+Constant-memory statistics over any number of games, mergeable across workers.
+
+``RunStats`` extends ``tournament.TournamentStats``, whose wins per seat and
+per strategy name count ties as shared wins, with a ``Distribution`` of
+pairs, turns and wall time per game. Each ``Distribution`` is a running
+mean/variance (Welford's update, Chan's merge) next to an
+``instrument.Histogram`` for percentiles, so memory does not grow with the
+number of games and any two RunStats of the same seating merge exactly.
+
+Usage: ``python -m gofish.stats builtin greedy random -n 1000000 --workers 8``
+"""
+import argparse
+import collections as coll
+import math
+import time
+import typing as tp
+
+from gofish.engine import GameResult, play_games
+from gofish.instrument import Histogram
+from gofish.tournament import STRATEGIES, TournamentStats, map_chunks
+
+
+class Distribution:
+    """Count, mean, variance, extremes and percentiles of a stream of non-negative ints."""
+
+    __slots__ = ('count', 'mean', 'm2', 'min', 'max', 'histogram')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = 0
+        self.max = 0
+        self.histogram = Histogram()
+
+    def add(self, value: int):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        if self.count == 1 or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        self.histogram.record(value)
+
+    def merge(self, other: 'Distribution') -> 'Distribution':
+        if other.count:
+            count = self.count + other.count
+            delta = other.mean - self.mean
+            self.m2 += other.m2 + delta * delta * self.count * other.count / count
+            self.mean += delta * other.count / count
+            if not self.count or other.min < self.min:
+                self.min = other.min
+            self.max = max(self.max, other.max)
+            self.count = count
+            self.histogram.merge(other.histogram)
+        return self
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def stdev(self) -> float:
+        return math.sqrt(self.variance)
+
+    def percentile(self, q: float) -> int:
+        return self.histogram.percentile(q)
+
+
+class RunStats(TournamentStats):
+    """
+    ``TournamentStats`` plus the spread of pairs per strategy and per seat, of
+    turns and of wall time per game, see the module docstring.
+    """
+
+    def __init__(self, names: tp.Sequence[str]):
+        super().__init__(names)
+        self.name_pairs: tp.Dict[str, Distribution] = coll.defaultdict(Distribution)
+        self.seat_pairs = [Distribution() for _ in self.names]
+        self.game_turns = Distribution()
+        self.duration_ns = Distribution()
+
+    def add_result(self, result: GameResult, names: tp.Optional[tp.Sequence[str]] = None,
+                   duration_ns: int = 0):
+        super().add_result(result, names)
+        for seat, (name, pairs) in enumerate(zip(names or self.names, result.pairs)):
+            self.name_pairs[name].add(pairs)
+            self.seat_pairs[seat].add(pairs)
+        self.game_turns.add(result.turns)
+        self.duration_ns.add(duration_ns)
+
+    def consume(self, results: tp.Iterable[GameResult]) -> 'RunStats':
+        """Add every result of a generator such as ``engine.play_games``, timing each game."""
+        clock = time.perf_counter_ns
+        start = clock()
+        for result in results:
+            self.add_result(result, duration_ns=clock() - start)
+            start = clock()
+        return self
+
+    def merge(self, other: 'RunStats') -> 'RunStats':
+        super().merge(other)
+        for name, dist in other.name_pairs.items():
+            self.name_pairs[name].merge(dist)
+        for mine, theirs in zip(self.seat_pairs, other.seat_pairs):
+            mine.merge(theirs)
+        self.game_turns.merge(other.game_turns)
+        self.duration_ns.merge(other.duration_ns)
+        return self
+
+    def report(self) -> str:
+        def spread(d: Distribution, scale: float = 1.0) -> str:
+            return (f'{d.mean / scale:>8.2f} ±{d.stdev / scale:<7.2f}'
+                    f'{d.percentile(50) / scale:>8.1f}{d.percentile(90) / scale:>8.1f}'
+                    f'{d.percentile(99) / scale:>8.1f}')
+        head = f'{"mean":>8} {"sd":<7}{"p50":>8}{"p90":>8}{"p99":>8}'
+        lines = [f'Games: {self.games}\tpairs per game by strategy and seat',
+                 f'{"":<14}{"win %":>7}  {head}']
+        for name in dict.fromkeys(self.names):
+            lines.append(f'{name:<14}{self.win_rate(name):>7.1%}  {spread(self.name_pairs[name])}')
+        for seat in range(len(self.names)):
+            rate = self.seat_wins[seat] / self.games if self.games else 0.0
+            lines.append(f'{f"seat {seat}":<14}{rate:>7.1%}  {spread(self.seat_pairs[seat])}')
+        lines.append(f'{"turns":<23}{spread(self.game_turns)}')
+        lines.append(f'{"game time us":<23}{spread(self.duration_ns, 1e3)}')
+        return '\n'.join(lines)
+
+
+def collect_chunk(names: tp.Sequence[str], n_games: int, seed: int) -> RunStats:
+    """Worker entry point: play n_games with one strategy name per seat."""
+    strategies = [STRATEGIES[n] for n in names]
+    return RunStats(names).consume(play_games(n_games, seed, strategies=strategies))
+
+
+def main(argv: tp.Optional[tp.Sequence[str]] = None):
+    parser = argparse.ArgumentParser(prog='gofish.stats', description=__doc__.splitlines()[1])
+    parser.add_argument('strategies', nargs='+', choices=sorted(STRATEGIES),
+                        help='strategy for each seat')
+    parser.add_argument('-n', '--games', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--chunk-size', type=int, default=10000)
+    parser.add_argument('--every', type=int, default=0,
+                        help='print the merged report every n chunks')
+    args = parser.parse_args(argv)
+    chunks = -(-args.games // args.chunk_size)
+    stats = RunStats(args.strategies)
+    for n, chunk in enumerate(map_chunks(collect_chunk, args.games, args.seed, args.workers,
+                                         args.chunk_size, (args.strategies,)), start=1):
+        stats.merge(chunk)
+        if args.every and n % args.every == 0 and n < chunks:
+            print(stats.report(), end='\n\n')
+    print(stats.report())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,250 @@
+"""
+Run AI strategies against each other across a process pool.
+
+With ``--duplicate`` every deal is replayed with the strategies rotated
+through all seats, so deal and seat order luck cancels out of the comparison.
+
+Usage: ``python -m gofish.tournament builtin greedy random -n 10000 --workers 4``
+"""
+import argparse
+import collections as coll
+import concurrent.futures as cf
+import typing as tp
+
+from gofish.engine import GameResult, play_duplicate, simulate
+from gofish.turn import Strategy, ai_strategy, greedy_strategy, memory_strategy, random_strategy
+
+STRATEGIES: tp.Dict[str, Strategy] = {
+    'builtin': ai_strategy,
+    'memory': memory_strategy,
+    'random': random_strategy,
+    'greedy': greedy_strategy,
+}
+
+
+def chunk_seed(seed: int, chunk: int) -> int:
+    """Seed for one chunk of games, independent of how chunks map to workers."""
+    return seed * 1_000_003 + chunk
+
+
+class TournamentStats:
+    """
+    Win, loss and pair totals per strategy name and per seat, mergeable across workers.
+
+    Wins count a tie for the most pairs as a shared win, so they are floats.
+    """
+
+    def __init__(self, names: tp.Sequence[str]):
+        self.names = tuple(names)
+        self.games = 0
+        self.seats = coll.Counter()
+        self.wins = coll.Counter()
+        self.pairs = coll.Counter()
+        self.seat_wins = coll.Counter()
+        self.turns = 0
+
+    def add_result(self, result: GameResult, names: tp.Optional[tp.Sequence[str]] = None):
+        """Count a game, names overrides the strategy of each seat for that game."""
+        names = names or self.names
+        self.games += 1
+        self.turns += result.turns
+        self.seats.update(names)
+        for seat, (name, pairs) in enumerate(zip(names, result.pairs)):
+            self.pairs[name] += pairs
+            share = result.win_share(seat)
+            if share:
+                self.wins[name] += share
+                self.seat_wins[seat] += share
+
+    def merge(self, other: 'TournamentStats') -> 'TournamentStats':
+        if other.names != self.names:
+            raise ValueError('Cannot merge stats of different seatings.')
+        self.games += other.games
+        self.turns += other.turns
+        self.seats += other.seats
+        self.wins += other.wins
+        self.pairs += other.pairs
+        self.seat_wins += other.seat_wins
+        return self
+
+    def losses(self, name: str) -> float:
+        return self.seats[name] - self.wins[name]
+
+    def win_rate(self, name: str) -> float:
+        return self.wins[name] / self.seats[name] if self.seats[name] else 0.0
+
+    def pairs_per_game(self, name: str) -> float:
+        return self.pairs[name] / self.seats[name] if self.seats[name] else 0.0
+
+    def report(self) -> str:
+        lines = [f'Games: {self.games}\tAvg turns: {self.turns / max(self.games, 1):.1f}',
+                 f'{"Strategy":<10}\t{"Wins":>8}\t{"Losses":>8}\t{"Win %":>6}\t{"Pairs/game":>10}']
+        for name in dict.fromkeys(self.names):
+            lines.append(f'{name:<10}\t{self.wins[name]:>8.1f}\t{self.losses(name):>8.1f}\t'
+                         f'{self.win_rate(name):>6.1%}\t'
+                         f'{self.pairs_per_game(name):>10.2f}')
+        return '\n'.join(lines)
+
+
+def rotate(names: tp.Sequence[str], k: int) -> tp.Tuple[str, ...]:
+    """Seating of game k of a duplicate deal, see ``engine.play_duplicate``."""
+    return tuple(names[(seat - k) % len(names)] for seat in range(len(names)))
+
+
+class DuplicateStats(TournamentStats):
+    """
+    TournamentStats of duplicate deals, plus the spread of each strategy's win share.
+
+    A strategy's score in one game is its seats' share of the win over its seat
+    count. Every game on its own is distributed like a game of plain random
+    play, so their variance stands for plain play, while the mean score over a
+    deal's rotations is what duplicate play measures.
+    """
+
+    def __init__(self, names: tp.Sequence[str]):
+        super().__init__(names)
+        self.deals = 0
+        # Sums and sums of squares of per-game and per-deal scores
+        self.game_sum = coll.Counter()
+        self.game_sq = coll.Counter()
+        self.deal_sum = coll.Counter()
+        self.deal_sq = coll.Counter()
+
+    def add_deal(self, results: tp.Sequence[GameResult]):
+        deal = coll.Counter()
+        for k, result in enumerate(results):
+            names = rotate(self.names, k)
+            self.add_result(result, names)
+            shares = coll.Counter()
+            for seat, name in enumerate(names):
+                shares[name] += result.win_share(seat)
+            for name in dict.fromkeys(names):
+                score = shares[name] / names.count(name)
+                self.game_sum[name] += score
+                self.game_sq[name] += score * score
+                deal[name] += score / len(results)
+        self.deals += 1
+        for name in dict.fromkeys(self.names):
+            self.deal_sum[name] += deal[name]
+            self.deal_sq[name] += deal[name] ** 2
+
+    def merge(self, other: 'DuplicateStats') -> 'DuplicateStats':
+        super().merge(other)
+        self.deals += other.deals
+        self.game_sum += other.game_sum
+        self.game_sq += other.game_sq
+        self.deal_sum += other.deal_sum
+        self.deal_sq += other.deal_sq
+        return self
+
+    @staticmethod
+    def _variance(total: float, squares: float, n: int) -> float:
+        return (squares - total * total / n) / (n - 1) if n > 1 else float('nan')
+
+    def variance_reduction(self, name: str) -> float:
+        """
+        Fraction of the variance of a win rate estimate removed by duplicate play.
+
+        Compares a deal's mean score with the mean of as many independent games,
+        so 0.75 means plain play needs four times the games for the same
+        confidence interval.
+        """
+        plain = self._variance(self.game_sum[name], self.game_sq[name], self.games)
+        dup = self._variance(self.deal_sum[name], self.deal_sq[name], self.deals)
+        per_deal = self.games / self.deals if self.deals else 1
+        return 1 - dup * per_deal / plain if plain else float('nan')
+
+    def report(self) -> str:
+        lines = [super().report(), f'Duplicate deals: {self.deals}',
+                 f'{"Strategy":<10}\t{"Var reduction":>13}\t{"Games saved":>11}']
+        for name in dict.fromkeys(self.names):
+            reduction = self.variance_reduction(name)
+            saved = 1 / (1 - reduction) if reduction != 1 else float('inf')
+            lines.append(f'{name:<10}\t{reduction:>13.1%}\t{saved:>10.1f}x')
+        return '\n'.join(lines)
+
+
+def play_chunk(names: tp.Sequence[str], n_games: int, seed: int) -> TournamentStats:
+    """Worker entry point: play n_games headless games with one strategy name per seat."""
+    stats = TournamentStats(names)
+    for result in simulate(n_games, seed, strategies=[STRATEGIES[n] for n in names]):
+        stats.add_result(result)
+    return stats
+
+
+def play_duplicate_chunk(names: tp.Sequence[str], n_deals: int, seed: int) -> DuplicateStats:
+    """Worker entry point: play n_deals duplicate deals, each once per rotation of names."""
+    stats = DuplicateStats(names)
+    for block in play_duplicate(n_deals, seed, [STRATEGIES[n] for n in names]):
+        stats.add_deal(block)
+    return stats
+
+
+T = tp.TypeVar('T')
+
+
+def map_chunks(play: tp.Callable[..., T], n_games: int, seed: int = 0,
+               workers: tp.Optional[int] = None, chunk_size: int = 1000,
+               args: tp.Sequence[tp.Any] = ()) -> tp.Iterator[T]:
+    """
+    Split n_games into seeded chunks and yield ``play(*args, size, seed)`` of each, in order.
+
+    Chunks run on a process pool, ``workers=1`` plays them in this process.
+    Results only depend on seed and chunk_size, not on the number of workers.
+    """
+    sizes = [chunk_size] * (n_games // chunk_size)
+    if n_games % chunk_size:
+        sizes.append(n_games % chunk_size)
+    seeds = [chunk_seed(seed, n) for n in range(len(sizes))]
+    calls = ([arg] * len(sizes) for arg in args)
+    if workers == 1:
+        yield from map(play, *calls, sizes, seeds)
+        return
+    with cf.ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(play, *calls, sizes, seeds)
+
+
+def run_tournament(names: tp.Sequence[str], n_games: int, seed: int = 0,
+                   workers: tp.Optional[int] = None, chunk_size: int = 1000,
+                   duplicate: bool = False) -> TournamentStats:
+    """
+    Split n_games into seeded chunks, play them on a process pool and merge the stats.
+
+    See ``map_chunks``, results only depend on seed and chunk_size.
+
+    :param names: one key of ``STRATEGIES`` per seat.
+    :param workers: pool size, ``1`` plays every chunk in this process.
+    :param duplicate: play n_games // len(names) duplicate deals instead, sizes
+        then count deals, and return DuplicateStats.
+    """
+    unknown = set(names) - STRATEGIES.keys()
+    if unknown:
+        raise KeyError(f'Unknown strategies: {", ".join(sorted(unknown))}')
+    if duplicate:
+        n_games //= len(names)
+        play, stats = play_duplicate_chunk, DuplicateStats(names)
+    else:
+        play, stats = play_chunk, TournamentStats(names)
+    for chunk in map_chunks(play, n_games, seed, workers, chunk_size, (names,)):
+        stats.merge(chunk)
+    return stats
+
+
+def main(argv: tp.Optional[tp.Sequence[str]] = None):
+    parser = argparse.ArgumentParser(prog='gofish.tournament', description=__doc__.splitlines()[1])
+    parser.add_argument('strategies', nargs='+', choices=sorted(STRATEGIES),
+                        help='strategy for each seat')
+    parser.add_argument('-n', '--games', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    parser.add_argument('--duplicate', action='store_true',
+                        help='replay every deal with the strategies rotated through the seats')
+    args = parser.parse_args(argv)
+    stats = run_tournament(args.strategies, args.games, args.seed, args.workers, args.chunk_size,
+                           args.duplicate)
+    print(stats.report())
+
+
+if __name__ == '__main__':
+    main()
@@ -1,12 +1,10 @@
 import collections as coll
 import enum
-import itertools as itt
-import random
-import types
 import typing as tp
 from gofish.interaction import GamePrompts, GameStrings
 from gofish.card import Card
 from gofish.player import AnyPlayer
+from gofish.rules import EndCondition
 
 prompt_ = GamePrompts()
 
@@ -41,34 +39,75 @@ def user_choose_opp(turn: 'Turn'):
 
 def ai_choose_card(turn: 'Turn'):
     """
-    Test for remembered cards weighted towards user's picks
+    Ask for the rank and opponent most likely to match.
 
-    Iterate over AI instance attribute's ``opp_choices`` if a user key exists
-    filter the set of cards to a tuple of matching
-    indexes in the AI instance attribute's ``hand``. If the tuple is empty
-    choose any card.
+    The AI's ``beliefs`` (a ``beliefs.CardTracker``) first looks for an opponent
+    known to hold one of its ranks, then for the best odds over unseen cards.
+    Near the end of the deck its ``endgame`` solver takes over.
     """
+    endgame = turn.active.endgame
+    if (endgame is not None and len(turn.game.deck) <= endgame.threshold
+            and endgame.supports(turn.game.rules, len(turn.game.players))):
+        rank, opp = endgame.choose(turn)
+    else:
+        rank, opp = turn.active.beliefs.best_ask(turn.game.turn_order)
+    turn.wanted_card = turn.active.hand.rank_card(rank)
+    turn.opponent = opp
+    return turn
+
+
+def ai_choose_opp(turn: 'Turn'):
+    if not turn.opponent:
+        turn.opponent = turn.game.rng.choice(turn.game.turn_order)
+
 
-    sorted_opp = dict(sorted(turn.active.opp_choices.items(), key=lambda x: x[0]._sort_order))
-    for opp, cards in sorted_opp.items():
-        # Since the set of remembered cards is not empty
-        # filtering out the None's will keep all matching indexes
-        matches = [
-            *itt.filterfalse(lambda x: x is None, map(turn.active.hand.has_match, cards))]
-        if matches:
-            # Set turn state values and return
+def memory_choose_card(turn: 'Turn'):
+    """
+    The remembered-asks AI the tracker replaced, ``bitboard.memory_strategy`` on a Turn.
+
+    Asks the first player in seat order for the lowest rank it failed to get
+    from us and we still hold, otherwise a random card of a random opponent.
+    """
+    tracker = turn.active.beliefs
+    held = tracker.certain[turn.active]
+    for opp in turn.game.players:
+        wanted = tracker.asked[opp] & held
+        if wanted:
+            turn.wanted_card = turn.active.hand.rank_card((wanted & -wanted).bit_length() - 1)
             turn.opponent = opp
-            turn.wanted_card = turn.active.hand.stack[matches.pop()]
             return turn
-    if not turn.wanted_card:
-        turn.wanted_card = random.choice(turn.active.hand.stack)
+    return random_choose_card(turn)
+
+
+def random_choose_card(turn: 'Turn'):
+    """Pick any card in hand, ignoring remembered asks."""
+    turn.wanted_card = turn.game.rng.choice(turn.active.hand.stack)
     return turn
 
 
-def ai_choose_opp(turn: 'Turn'):
+def greedy_choose_card(turn: 'Turn'):
+    """Ask for the rank held most often, closest to completing a pair."""
+    hand = turn.active.hand
+    turn.wanted_card = max(hand, key=lambda c: hand.rank_count(c.rank))
+    return turn
+
+
+def most_cards_choose_opp(turn: 'Turn'):
+    """Ask the opponent holding the most cards."""
     if not turn.opponent:
-        turn.opponent = random.choice(turn.game.turn_order)
+        turn.opponent = max(turn.game.turn_order, key=lambda p: len(p.hand))
+
+
+def chosen_opp(turn: 'Turn'):
+    """Opponent strategy for card strategies that already picked the opponent."""
+
 
+Strategy = coll.namedtuple('Strategy', 'card opp')
+user_strategy = Strategy(user_choose_card, user_choose_opp)
+ai_strategy = Strategy(ai_choose_card, ai_choose_opp)
+memory_strategy = Strategy(memory_choose_card, ai_choose_opp)
+random_strategy = Strategy(random_choose_card, ai_choose_opp)
+greedy_strategy = Strategy(greedy_choose_card, most_cards_choose_opp)
 
 Turns = coll.namedtuple('Turns', 'user ai')
 gofish_turns = Turns({'card': user_choose_card, 'opp': user_choose_opp},
@@ -76,17 +115,49 @@ gofish_turns = Turns({'card': user_choose_card, 'opp': user_choose_opp},
 
 
 class Turn:
-    def __init__(self, game, card_strat=user_choose_card, opp_strat=user_choose_opp):
+    """
+    State machine for the active player's turn, one instance is reused for a whole game.
+
+    ``start`` takes the next player off the turn order and resets the state to
+    ``IN_PROGRESS``. ``do_ask`` ends in ``ASKED_MATCH`` or leaves the turn in
+    progress for ``do_go_fish``, which ends in one of the ``FISH_*`` outcomes.
+    """
+
+    def __init__(self, game):
         self.game = game
-        self.active = game.turn_order.popleft()
+        self.active: tp.Optional[AnyPlayer] = None
         self.outcome = TurnOutcomes.IN_PROGRESS
-        self.card_strat = types.MethodType(card_strat, self)
-        self.opp_strat = types.MethodType(opp_strat, self)
+        self.card_strat = user_choose_card
+        self.opp_strat = user_choose_opp
         self.opponent: tp.Optional[AnyPlayer] = None
         self.wanted_card: tp.Optional[Card] = None
         self.matching_card: tp.Optional[Card] = None
         self.go_fish_card: tp.Optional[Card] = None
 
+    def start(self, strategy: 'Strategy') -> 'Turn':
+        """
+        Begin the turn of the first player in the turn order, who plays strategy.
+
+        Under ``DECK_OUT`` rules a player with an empty hand first draws a card.
+        """
+        self.active = self.game.turn_order.popleft()
+        self.outcome = TurnOutcomes.IN_PROGRESS
+        self.card_strat, self.opp_strat = strategy
+        self.opponent = None
+        self.wanted_card = None
+        self.matching_card = None
+        self.go_fish_card = None
+        if not self.active.hand and self.game.deck and self.game.rules.end is EndCondition.DECK_OUT:
+            card = self.game.deck.take_top()
+            self.active.hand.add_to_hand(card)
+            self.game.announce_draw(self.active, card, TurnOutcomes.IN_PROGRESS)
+        return self
+
+    def choose(self):
+        """Let the active player's strategy pick wanted_card and opponent."""
+        self.card_strat(self)
+        self.opp_strat(self)
+
     def print_stats(self):
         print(f'Deck: {len(self.game.deck)}')
         # print('{:>10}\t{:>5}\t{:^5}'.format(*'Player Cards Score'.split()))
@@ -95,34 +166,52 @@ class Turn:
         print(self.game.user)
 
     def enter(self):
+        self.game.messages.wait()
         clear_screen()
-        self.outcome = TurnOutcomes.IN_PROGRESS
         self.print_stats()
         print(self.active.title)
-        self.card_strat().opp_strat()
+        self.choose()
         return self
 
     def exit(self):
         self.game.messages.execute()
-        self.active.collect_pairs()
+        self.collect_pairs()
+        self.game.check_hands(self.active, self.opponent)
 
-    def execute(self):
-        self.enter().do_ask()
+    def collect_pairs(self):
+        self.game.announce_pairs(self.active, self.active.collect_pairs(self.game.rules.set_size))
+
+    def resolve(self):
+        """Play the chosen ask to the end of the turn: ask, go fishing on a miss, exit."""
+        self.do_ask()
         if self.outcome is TurnOutcomes.IN_PROGRESS:
             self.do_go_fish()
         self.exit()
 
+    def execute(self):
+        if self.game.hooks is not None:
+            return self.game.hooks.run_turn(self)
+        self.enter().resolve()
+
+    def check_answer(self, matched: bool):
+        """Make a human opponent answer the ask truthfully."""
+        self.game.prompts.have_card(self, matched)
+
     def do_ask(self, outcomes=TurnOutcomes):
         """Check opponent's hand for a match to wanted card."""
 
         self.game.messages.add_message(self.game.strings.ASK_CARD, turn=self)
         match = self.opponent.hand.has_match(self.wanted_card)
+        if self.opponent.is_human:
+            self.check_answer(match is not None)
         if match is not None:
             self.outcome = outcomes.ASKED_MATCH
             self.game.messages.add_message(self.game.strings.RESPOND_POS, turn=self)
-            self.active.hand.add_to_hand(self.opponent.hand.pop_card(match))
+            match = self.opponent.hand.pop_card(match.rank)
+            self.active.hand.add_to_hand(match)
         else:
             self.game.messages.add_message(self.game.strings.RESPOND_NEG, turn=self)
+        self.game.announce_ask(self.active, self.opponent, self.wanted_card.rank, match)
 
     def do_go_fish(self, outcomes=TurnOutcomes):
         """Player draws from the deck and checks for matches
@@ -133,36 +222,17 @@ class Turn:
 
         self.go_fish_card = self.game.deck.take_top()
         if self.wanted_card.same_rank(self.go_fish_card):
-            # if not self.opponent.is_human:
-            #     self.opponent.forget(self.active, self.wanted_card)
             self.outcome = outcomes.FISH_MATCH
             self.game.messages.add_message(self.game.strings.FISH_MATCH, turn=self)
         else:
-            if not self.opponent.is_human:
-                self.opponent.remember(self.active, self.wanted_card)
             matches = self.active.hand.has_match(self.go_fish_card)
             if matches is not None:
-                self.matching_card = self.active.hand.pop_card(matches)
+                self.matching_card = self.active.hand.pop_card(matches.rank)
                 self.outcome = outcomes.FISH_OTHER
                 self.game.messages.add_message(self.game.strings.FISH_OTHER, turn=self)
             else:
                 self.outcome = outcomes.FISH_NONE
                 self.game.messages.add_message(self.game.strings.FISH_NONE, turn=self)
         self.active.hand.add_to_hand(*[c for c in [self.go_fish_card, self.matching_card] if c])
-
-
-class AiTurn(Turn):
-    def __init__(self, game):
-        super().__init__(game, ai_choose_card, ai_choose_opp)
-
-    def do_ask(self, outcomes=TurnOutcomes):
-        self.outcome = outcomes.IN_PROGRESS
-        self.game.messages.add_message(self.game.strings.ASK_CARD, turn=self)
-        match = self.opponent.hand.has_match(self.wanted_card)
-        self.game.prompts.have_card(self, False if match is None else True)
-        if match is not None:
-            self.outcome = outcomes.ASKED_MATCH
-            self.game.messages.add_message(self.game.strings.RESPOND_POS, turn=self)
-            self.active.hand.add_to_hand(self.opponent.hand.pop_card(match))
-        else:
-            self.game.messages.add_message(self.game.strings.RESPOND_NEG, turn=self)
+        if self.go_fish_card:
+            self.game.announce_draw(self.active, self.go_fish_card, self.outcome)